@@ -1,5 +1,5 @@
 ### ---------- credits_per_major.py ---------- ###
-import requests
+from UIC import http_client
 from bs4 import BeautifulSoup
 import re
 import json
@@ -8,7 +8,7 @@ BASE_URL = "https://catalog.uic.edu"
 START_URL = f"{BASE_URL}/ucat/colleges-depts/"
 
 def get_all_college_dept_links():
-    response = requests.get(START_URL)
+    response = http_client.get(START_URL)
     soup = BeautifulSoup(response.text, "html.parser")
 
     links = set()
@@ -21,7 +21,7 @@ def get_all_college_dept_links():
 
 def extract_degrees_and_credits(url):
     try:
-        response = requests.get(url, timeout=10)
+        response = http_client.get(url)
         soup = BeautifulSoup(response.text, "html.parser")
         results = []
 
@@ -0,0 +1,235 @@
+import argparse
+import glob
+import os
+import time
+from collections import defaultdict
+
+import tsv_loader
+
+# Micro-benchmark for tsv_loader against the per-script loaders it replaced.
+# Loads every subject folder under each tree with both implementations,
+# checks the results agree, and prints the time per loader.
+#
+#   python UIC/bench_loaders.py [UIC/data/subjects UIS/data/subjects] [--repeat 5]
+
+# ===================== Reference: previous loaders =====================
+# Verbatim from build_combined_json.py (UIC) and uis_scraper.py (UIS timings)
+
+def legacy_normalize_code(code):
+    return code.strip().ljust(8, '_')
+
+def legacy_load_master_course_list(path):
+    credits = {}
+    with open(path) as f:
+        for line in f:
+            parts = line.strip().split('\t')
+            if len(parts) == 2:
+                code, credit = parts
+                credits[legacy_normalize_code(code)] = credit
+    return credits
+
+def legacy_load_prerequisites(path):
+    prereqs = defaultdict(list)
+    with open(path) as f:
+        for line in f:
+            parts = line.strip().split('\t')
+            if len(parts) == 3:
+                prereq, course, flag = parts
+                prereq = legacy_normalize_code(prereq)
+                course = legacy_normalize_code(course)
+                prereqs[course].append({
+                    "id": prereq,
+                    "type": flag
+                })
+    return prereqs
+
+def legacy_load_course_offerings(path):
+    offerings = {}
+    with open(path) as f:
+        for line in f:
+            parts = line.strip().split('\t')
+            if len(parts) == 3:
+                code, fall, spring = parts
+                offerings[legacy_normalize_code(code)] = {
+                    "fall": fall == "1",
+                    "spring": spring == "1"
+                }
+    return offerings
+
+def legacy_load_course_timings_uic(path):
+    # course_code → { "fall": [...], "spring": [...] }
+    timing_by_course = defaultdict(lambda: {"fall": [], "spring": []})
+
+    with open(path) as f:
+        for line in f:
+            parts = line.strip().split('\t')
+            if len(parts) < 5:
+                continue
+
+            course_code = legacy_normalize_code(parts[0])
+            term = parts[1].strip().lower()  # "fall" or "spring"
+            try:
+                # we don't need these, but parsing advances the offset
+                _num_sections = int(parts[2])
+                _num_sessions = int(parts[3])
+            except ValueError:
+                continue
+
+            crn_blocks = parts[4:]
+            times = []
+
+            for i in range(0, len(crn_blocks), 3):
+                try:
+                    crn = crn_blocks[i]
+                    start = int(crn_blocks[i + 1])
+                    end = int(crn_blocks[i + 2])
+                    times.append((crn, start, end))
+                except (IndexError, ValueError):
+                    continue
+
+            crn_sessions = defaultdict(list)
+            for crn, start, end in times:
+                crn_sessions[crn].append((start, end))
+
+            for crn, session_list in crn_sessions.items():
+                time_flat = [t for pair in session_list for t in pair]
+                timing_by_course[course_code][term].append({
+                    "crn": crn,
+                    "days": len(session_list),
+                    "time": time_flat
+                })
+
+    return timing_by_course
+
+# ===================== Builder =====================
+
+
+def legacy_load_course_timings_uis(path):
+    """
+    Supports BOTH formats:
+
+    A) With term:
+       code  term  num_crns  num_sessions  crn  start  end  [crn start end]...
+
+    B) Without term:
+       code  num_crns  num_sessions  crn  start  end  [crn start end]...
+       -> stored under 'both' and later fanned out to offered terms.
+    """
+    timing_by_course = defaultdict(lambda: {"fall": [], "spring": [], "both": []})
+
+    with open(path) as f:
+        for line in f:
+            parts = line.strip().split('\t')
+            if len(parts) < 4:
+                continue
+
+            code = legacy_normalize_code(parts[0])
+            # robust term detection
+            maybe_term = parts[1].strip().lower()
+            has_term = maybe_term in {"fall", "spring"}
+            idx = 2 if has_term else 1  # index for num_crns
+
+            # Try to parse num_crns / num_sessions (for offset only)
+            try:
+                _num_crns = int(parts[idx]); _num_sessions = int(parts[idx + 1])
+            except Exception:
+                # If malformed counts, try to continue regardless
+                pass
+
+            triplet_start = idx + 2
+            crn_blocks = parts[triplet_start:]
+
+            # Parse [CRN start end] triplets
+            sessions = []
+            for i in range(0, len(crn_blocks), 3):
+                try:
+                    crn = crn_blocks[i]
+                    start = int(crn_blocks[i + 1])
+                    end = int(crn_blocks[i + 2])
+                    sessions.append((crn, start, end))
+                except (IndexError, ValueError):
+                    continue
+
+            # Group by CRN then flatten times per CRN
+            crn_sessions = defaultdict(list)
+            for crn, start, end in sessions:
+                crn_sessions[crn].append((start, end))
+
+            payload = []
+            for crn, sess_list in crn_sessions.items():
+                # flatten list of (start,end) pairs → [s1,e1,s2,e2,...]
+                flat_times = [t for pair in sess_list for t in pair]
+                payload.append({
+                    "crn": crn,
+                    "days": len(sess_list),
+                    "time": flat_times,
+                })
+
+            if has_term:
+                term = maybe_term  # already lower()
+                timing_by_course[code][term].extend(payload)
+            else:
+                timing_by_course[code]["both"].extend(payload)
+
+    return timing_by_course
+
+# ===================== Benchmark =====================
+
+LOADERS = {
+    "mastercourselist": (legacy_load_master_course_list, tsv_loader.load_master_course_list),
+    "prerequisites": (legacy_load_prerequisites, tsv_loader.load_prerequisites),
+    "courseoffering": (legacy_load_course_offerings, tsv_loader.load_course_offerings),
+    "coursetiming": (legacy_load_course_timings_uis, tsv_loader.load_course_timings),
+}
+
+
+def subject_files(base_dir, prefix):
+    return sorted(glob.glob(os.path.join(base_dir, "*", f"{prefix}_*.txt")))
+
+
+def as_plain(result):
+    """Legacy loaders return defaultdicts; compare as plain dicts."""
+    return {key: dict(value) if isinstance(value, dict) else value for key, value in result.items()}
+
+
+def time_loader(loader, paths, repeat):
+    """Best-of-`repeat` seconds to load every file in `paths`."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for path in paths:
+            loader(path)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark tsv_loader against the previous loaders")
+    parser.add_argument("trees", nargs="*", default=["UIC/data/subjects", "UIS/data/subjects"])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for base_dir in args.trees:
+        print(f"\n{base_dir}")
+        print(f"{'file':<18} {'files':>6} {'rows':>7} {'legacy ms':>10} {'shared ms':>10} {'speedup':>8}")
+        totals = [0.0, 0.0]
+        for prefix, (legacy, shared) in LOADERS.items():
+            paths = subject_files(base_dir, prefix)
+            rows = 0
+            for path in paths:
+                with open(path) as f:
+                    rows += sum(1 for _ in f)
+                if as_plain(legacy(path)) != shared(path):
+                    print(f"⚠️ {path}: shared loader differs from the legacy loader")
+            old = time_loader(legacy, paths, args.repeat)
+            new = time_loader(shared, paths, args.repeat)
+            totals[0] += old
+            totals[1] += new
+            print(f"{prefix:<18} {len(paths):>6} {rows:>7} {old * 1000:>10.2f} {new * 1000:>10.2f} "
+                  f"{old / new if new else 0:>7.1f}x")
+        print(f"{'total':<18} {'':>6} {'':>7} {totals[0] * 1000:>10.2f} {totals[1] * 1000:>10.2f} "
+              f"{totals[0] / totals[1] if totals[1] else 0:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
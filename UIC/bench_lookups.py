@@ -0,0 +1,109 @@
+import argparse
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+
+import duckdb
+
+from build_duckdb import DEFAULT_JSON_PATH, add_subject, create_tables
+from duckdb_batch import ColumnBatch
+from duckdb_layout import optimize_layout
+
+# Point-lookup latency of the DuckDB catalog before and after duckdb_layout.py.
+# Both databases are built from the same JSON: "before" the way the builders
+# did it before the layout step (rows in insertion order, no indexes), "after"
+# a copy of it with optimize_layout applied (sorted, indexed). The rows are the
+# same; only the layout differs.
+#
+#   python UIC/bench_lookups.py [--json UIC/data/combined.json] [--sample 200] [--repeat 10]
+
+QUERIES = {
+    "course by id": "SELECT * FROM courses WHERE course_id = $1",
+    "prerequisites of": "SELECT prereq_id, type FROM prerequisites WHERE course_id = $1",
+    "unlocked by": "SELECT course_id FROM prerequisites WHERE prereq_id = $1",
+    "timings of": "SELECT group_idx, start, end_time FROM timings WHERE course_id = $1",
+    "fall timings": "SELECT group_idx, start, end_time FROM timings WHERE course_id = $1 AND term = 'fall'",
+    "lecture days of": "SELECT * FROM lecture_days WHERE course_id = $1",
+}
+
+
+def build_before(data, db_path):
+    """The catalog tables as the builders wrote them before the layout step."""
+    con = duckdb.connect(db_path)
+    create_tables(con)
+    batch = ColumnBatch(con)
+    for subject, subject_data in data.items():
+        add_subject(batch, subject, subject_data)
+    batch.flush(con)
+    con.close()
+
+
+def build_after(before_path, db_path):
+    """Copy of `before_path` with optimize_layout applied; returns its seconds."""
+    con = duckdb.connect(db_path)
+    con.execute(f"ATTACH '{before_path}' AS before (READ_ONLY)")
+    con.execute("COPY FROM DATABASE before TO " + con.execute("SELECT current_database()").fetchone()[0])
+    con.execute("DETACH before")
+    started = time.perf_counter()
+    optimize_layout(con)
+    elapsed = time.perf_counter() - started
+    con.close()
+    return elapsed
+
+
+def time_queries(cons, query, course_ids, repeat):
+    """Median microseconds per lookup for each connection, over `repeat` passes of `course_ids`.
+
+    The connections take turns on every lookup, so machine noise hits both alike.
+    """
+    timings = [[] for _ in cons]
+    for _ in range(repeat):
+        for course_id in course_ids:
+            for con, samples in zip(cons, timings):
+                start = time.perf_counter()
+                con.execute(query, [course_id]).fetchall()
+                samples.append(time.perf_counter() - start)
+    return [statistics.median(samples) * 1e6 for samples in timings]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark point lookups before and after the DuckDB layout step")
+    parser.add_argument("--json", default=DEFAULT_JSON_PATH,
+                        help="catalog JSON to build both databases from (default: %(default)s)")
+    parser.add_argument("--sample", type=int, default=200,
+                        help="course ids to look up (default: %(default)s)")
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    with open(args.json) as f:
+        data = json.load(f)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        before_path = os.path.join(tmp_dir, "before.duckdb")
+        after_path = os.path.join(tmp_dir, "after.duckdb")
+        build_before(data, before_path)
+        layout_seconds = build_after(before_path, after_path)
+        before = duckdb.connect(before_path, read_only=True)
+        after = duckdb.connect(after_path, read_only=True)
+
+        course_ids = [row[0] for row in before.execute("SELECT course_id FROM courses").fetchall()]
+        course_ids = random.Random(0).sample(course_ids, min(args.sample, len(course_ids)))
+
+        print(f"{args.json}: {len(course_ids)} course ids × {args.repeat}, layout step {layout_seconds * 1000:.0f} ms")
+        print(f"{'lookup':<18} {'before µs':>10} {'after µs':>10} {'speedup':>8}")
+        for name, query in QUERIES.items():
+            for course_id in course_ids[:5]:
+                if sorted(before.execute(query, [course_id]).fetchall()) != \
+                        sorted(after.execute(query, [course_id]).fetchall()):
+                    print(f"⚠️ {name}: results differ for {course_id}")
+            old, new = time_queries([before, after], query, course_ids, args.repeat)
+            print(f"{name:<18} {old:>10.1f} {new:>10.1f} {old / new if new else 0:>7.1f}x")
+        before.close()
+        after.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+import argparse
+import statistics
+import time
+
+from schedule_parser import available_backends, extract_course_blocks
+from snapshots import SnapshotStore
+
+# Per-page parse-time benchmark for the schedule_parser backends.
+# Runs over a snapshot taken with `scrape_subject_links.py --snapshot DIR`,
+# checks every backend returns the same blocks as BeautifulSoup, and
+# prints timing per backend.
+#
+#   python UIC/bench_parser.py DIR [--repeat 3]
+
+
+def load_pages(store):
+    pages = []
+    for subject in store.subjects():
+        for term_key, html in store.pages(subject).items():
+            if html is not None:
+                pages.append((f"{subject} {term_key}", html))
+    return pages
+
+
+def time_backend(pages, backend, repeat):
+    """Best-of-`repeat` parse time (seconds) for each page."""
+    timings = []
+    for _, html in pages:
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            extract_course_blocks(html, backend)
+            best = min(best, time.perf_counter() - start)
+        timings.append(best)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark schedule page parser backends")
+    parser.add_argument("snapshot", help="snapshot store directory")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    pages = load_pages(SnapshotStore(args.snapshot))
+    if not pages:
+        raise SystemExit(f"No pages found in snapshot {args.snapshot}")
+    total_kb = sum(len(html) for _, html in pages) / 1024
+    print(f"{len(pages)} pages, {total_kb:.0f} KB of HTML")
+
+    backends = available_backends()
+    mismatches = {}
+    for backend in backends:
+        if backend == "bs4":
+            continue
+        mismatches[backend] = [
+            label for label, html in pages
+            if extract_course_blocks(html, backend) != extract_course_blocks(html, "bs4")
+        ]
+
+    results = {backend: time_backend(pages, backend, args.repeat) for backend in backends}
+    reference = statistics.mean(results["bs4"])
+
+    print(f"\n{'backend':<8} {'mean ms':>9} {'p50 ms':>9} {'max ms':>9} {'total s':>9} {'speedup':>8}")
+    for backend, timings in results.items():
+        mean = statistics.mean(timings)
+        print(f"{backend:<8} {mean * 1000:>9.2f} {statistics.median(timings) * 1000:>9.2f} "
+              f"{max(timings) * 1000:>9.2f} {sum(timings):>9.2f} {reference / mean:>7.1f}x")
+
+    for backend, labels in mismatches.items():
+        if labels:
+            print(f"\n⚠️ {backend} differs from bs4 on {len(labels)} pages, e.g. {', '.join(labels[:5])}")
+        else:
+            print(f"\n✅ {backend} output identical to bs4 on all pages")
+
+
+if __name__ == "__main__":
+    main()
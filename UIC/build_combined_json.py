@@ -1,152 +1,144 @@
 import os
-import re
 import json
-import requests
-from bs4 import BeautifulSoup
-from collections import defaultdict
+import argparse
+import http_client
+from subject_names import SubjectNameCache, DEFAULT_NAME_CACHE_PATH, extract_subject_name
+from incremental_json import build_combined, file_sha256
+from json_shards import DEFAULT_SHARD_DIR
+from tsv_loader import (
+    load_master_course_list, load_prerequisites, load_course_offerings, load_course_timings,
+    master_course_list_from_rows, prerequisites_from_rows, course_offerings_from_rows, course_timings_from_rows,
+)
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 
 # ===================== Subject-name helper (UIC) =====================
 
 BASE_UIC_SCHEDULE = "https://webcs7.osss.uic.edu/schedule-of-classes/static/schedules"
 
-def _extract_subject_name_from_html(html: str) -> str | None:
-    soup = BeautifulSoup(html, "html.parser")
-    # Gather all visible text chunks
-    texts = []
-    for el in soup.find_all(text=True):
-        txt = el.strip()
-        if txt and len(txt) < 120:  # ignore long paragraphs
-            texts.append(txt)
-
-    for txt in texts:
-        m = re.search(r"(Fall|Spring)\s+\d{4}\s+([A-Za-z0-9&/\-.,\s]+)", txt, flags=re.I)
-        if m:
-            name = m.group(2).strip()
-            # Remove trailing stuff after "Location:" or "Phone:"
-            name = re.split(r"\bLocation\b|\bPhone\b|Last generated:", name, maxsplit=1)[0].strip(" -:.,")
-            if len(name) > 3 and name.lower() != "semester":
-                return name.lower()
-    return None
-
-
-def get_uic_subject_name(subject_code: str, fallback_years=(2025, 2024)) -> str:
+def get_uic_subject_name(subject_code: str, fallback_years=(2025, 2024)) -> str | None:
     """
     Fetch one or more subject pages until we can extract a readable subject name.
     Tries Fall then Spring for each year in fallback_years.
-    Falls back to the subject_code if nothing is found.
+    Returns None if nothing is found.
     """
     for year in fallback_years:
         for term in ("fall", "spring"):
             url = f"{BASE_UIC_SCHEDULE}/{term}-{year}/{subject_code}.html"
             try:
-                resp = requests.get(url, timeout=20)
+                resp = http_client.get(url, timeout=20)
                 if resp.status_code != 200:
                     continue
-                name = _extract_subject_name_from_html(resp.text)
+                name = extract_subject_name(resp.text)
                 if name:
-                    return name.lower()
+                    return name
             except Exception:
                 continue
-    return subject_code.lower()  # safe fallback
-
-# ===================== Your existing helpers =====================
-
-def normalize_code(code):
-    return code.strip().ljust(8, '_')
-
-def load_master_course_list(path):
-    credits = {}
-    with open(path) as f:
-        for line in f:
-            parts = line.strip().split('\t')
-            if len(parts) == 2:
-                code, credit = parts
-                credits[normalize_code(code)] = credit
-    return credits
-
-def load_prerequisites(path):
-    prereqs = defaultdict(list)
-    with open(path) as f:
-        for line in f:
-            parts = line.strip().split('\t')
-            if len(parts) == 3:
-                prereq, course, flag = parts
-                prereq = normalize_code(prereq)
-                course = normalize_code(course)
-                prereqs[course].append({
-                    "id": prereq,
-                    "type": flag
-                })
-    return prereqs
-
-def load_course_offerings(path):
-    offerings = {}
-    with open(path) as f:
-        for line in f:
-            parts = line.strip().split('\t')
-            if len(parts) == 3:
-                code, fall, spring = parts
-                offerings[normalize_code(code)] = {
-                    "fall": fall == "1",
-                    "spring": spring == "1"
-                }
-    return offerings
-
-def load_course_timings(path):
-    # course_code → { "fall": [...], "spring": [...] }
-    timing_by_course = defaultdict(lambda: {"fall": [], "spring": []})
-
-    with open(path) as f:
-        for line in f:
-            parts = line.strip().split('\t')
-            if len(parts) < 5:
-                continue
+    return None
 
-            course_code = normalize_code(parts[0])
-            term = parts[1].strip().lower()  # "fall" or "spring"
-            try:
-                # we don't need these, but parsing advances the offset
-                _num_sections = int(parts[2])
-                _num_sessions = int(parts[3])
-            except ValueError:
-                continue
 
-            crn_blocks = parts[4:]
-            times = []
+def load_subject_names(subjects, cache_path=DEFAULT_NAME_CACHE_PATH, max_workers=8):
+    """Subject code → name for `subjects`.
 
-            for i in range(0, len(crn_blocks), 3):
-                try:
-                    crn = crn_blocks[i]
-                    start = int(crn_blocks[i + 1])
-                    end = int(crn_blocks[i + 2])
-                    times.append((crn, start, end))
-                except (IndexError, ValueError):
-                    continue
+    Names come from the cache filled by scrape_subject_links.py; only
+    missing subjects are looked up online (in parallel) and added to the
+    cache. Subjects without any name fall back to the lowercased code,
+    which is cached too so warm runs stay offline (the next scrape
+    replaces it once a page shows the real name).
+    """
+    cache = SubjectNameCache(cache_path)
+    missing = cache.missing(subjects)
+    if missing:
+        print(f"🔎 Looking up {len(missing)} subject names not in {cache_path}")
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            for subject, name in zip(missing, pool.map(get_uic_subject_name, missing)):
+                cache.put(subject, name or subject.lower())
+        cache.save()
+    return {subject: cache.get(subject) for subject in subjects}
 
-            crn_sessions = defaultdict(list)
-            for crn, start, end in times:
-                crn_sessions[crn].append((start, end))
+# ===================== Builder =====================
 
-            for crn, session_list in crn_sessions.items():
-                time_flat = [t for pair in session_list for t in pair]
-                timing_by_course[course_code][term].append({
-                    "crn": crn,
-                    "days": len(session_list),
-                    "time": time_flat
-                })
+def assemble_courses(credits, prereqs, offerings, timings, backfilled_courses):
+    """One subject's course_array from its parsed master list, prereqs, offerings and timings."""
+    course_array = []
+    for course_code in sorted(credits.keys()):
+        credit_str = credits[course_code]
+        credits_list = [
+            float(c.strip())
+            for c in credit_str.split(',')
+            if c.strip().replace('.', '', 1).isdigit()
+        ]
+
+        # keep courses even if credits couldn't parse? (your original kept all)
+        # if you want to skip non-numeric credits, uncomment:
+        # if not credits_list:
+        #     continue
+
+        course_data = {
+            "id": course_code,
+            "credits": credits_list if credits_list else [],  # [] when "???"
+            "prerequisites": prereqs.get(course_code, [])
+        }
 
-    return timing_by_course
+        # Offerings logic
+        if course_code in offerings:
+            course_data["offerings"] = offerings[course_code]
+        elif course_code in backfilled_courses:
+            course_data["offerings"] = {"fall": False, "spring": False}
+        else:
+            course_data["offerings"] = {"fall": True, "spring": True}
 
-# ===================== Builder =====================
+        # Timing
+        if course_code in timings:
+            timing_info = timings[course_code]
+            if timing_info.get("fall"):
+                course_data["timing_fall"] = timing_info["fall"]
+            if timing_info.get("spring"):
+                course_data["timing_spring"] = timing_info["spring"]
 
-def build_combined_json():
-    base_dir = "UIC/data/subjects"
-    combined = {}
+        course_array.append(course_data)
+    return course_array
 
-    # Load list of backfilled courses
-    credit_cache_path = "UIC/data/data_archive/credit_cache.json"
-    backfilled_courses = set()
 
+def build_subject_courses(subject, subject_path, backfilled_courses):
+    """Build one subject's course_array from its four TSV files.
+
+    Returns None when a file is missing. Module-level so it can run in a
+    ProcessPoolExecutor worker.
+    """
+    files = {
+        "credits": os.path.join(subject_path, f"mastercourselist_{subject}.txt"),
+        "prereqs": os.path.join(subject_path, f"prerequisites_{subject}.txt"),
+        "offerings": os.path.join(subject_path, f"courseoffering_{subject}.txt"),
+        "timings": os.path.join(subject_path, f"coursetiming_{subject}.txt"),
+    }
+
+    if not all(os.path.exists(p) for p in files.values()):
+        return None
+
+    return assemble_courses(
+        load_master_course_list(files["credits"]),
+        load_prerequisites(files["prereqs"]),
+        load_course_offerings(files["offerings"]),
+        load_course_timings(files["timings"]),
+        backfilled_courses,
+    )
+
+
+def courses_from_rows(rows, backfilled_courses):
+    """Same as build_subject_courses, from scrape_subject_links.subject_rows() output."""
+    return assemble_courses(
+        master_course_list_from_rows(rows["mastercourselist"]),
+        prerequisites_from_rows(rows["prerequisites"]),
+        course_offerings_from_rows(rows["courseoffering"]),
+        course_timings_from_rows(rows["coursetiming"]),
+        backfilled_courses,
+    )
+
+
+def load_backfilled_courses(credit_cache_path):
+    """Normalized codes ("CS___113") of courses whose credits were backfilled from the catalog."""
+    backfilled_courses = set()
     if os.path.exists(credit_cache_path):
         try:
             with open(credit_cache_path) as f:
@@ -158,86 +150,59 @@ def build_combined_json():
                     backfilled_courses.add(normalized)
         except Exception:
             pass
+    return backfilled_courses
 
-    if not os.path.isdir(base_dir):
-        raise FileNotFoundError(f"Base directory not found: {base_dir}")
 
-    for subject in sorted(os.listdir(base_dir)):
-        subject_path = os.path.join(base_dir, subject)
-        if not os.path.isdir(subject_path):
-            continue
+DEFAULT_BUILD_MANIFEST_PATH = "UIC/data/combined_manifest.json"
+DEFAULT_CREDIT_CACHE_PATH = "UIC/data/data_archive/credit_cache.json"
+DEFAULT_OUTPUT_PATH = "UIC/data/combined.json"
 
-        files = {
-            "credits": os.path.join(subject_path, f"mastercourselist_{subject}.txt"),
-            "prereqs": os.path.join(subject_path, f"prerequisites_{subject}.txt"),
-            "offerings": os.path.join(subject_path, f"courseoffering_{subject}.txt"),
-            "timings": os.path.join(subject_path, f"coursetiming_{subject}.txt"),
-        }
 
-        if not all(os.path.exists(p) for p in files.values()):
-            print(f"⚠️ Skipping {subject}: missing one or more files")
-            continue
-
-        # NEW: pull human-readable subject name
-        subject_name = get_uic_subject_name(subject)
-
-        credits = load_master_course_list(files["credits"])
-        prereqs = load_prerequisites(files["prereqs"])
-        offerings = load_course_offerings(files["offerings"])
-        timings = load_course_timings(files["timings"])
-
-        course_array = []
-        for course_code in sorted(credits.keys()):
-            credit_str = credits[course_code]
-            credits_list = [
-                float(c.strip())
-                for c in credit_str.split(',')
-                if c.strip().replace('.', '', 1).isdigit()
-            ]
-
-            # keep courses even if credits couldn't parse? (your original kept all)
-            # if you want to skip non-numeric credits, uncomment:
-            # if not credits_list:
-            #     continue
-
-            course_data = {
-                "id": course_code,
-                "credits": credits_list if credits_list else [],  # [] when "???"
-                "prerequisites": prereqs.get(course_code, [])
-            }
-
-            # Offerings logic
-            if course_code in offerings:
-                course_data["offerings"] = offerings[course_code]
-            elif course_code in backfilled_courses:
-                course_data["offerings"] = {"fall": False, "spring": False}
-            else:
-                course_data["offerings"] = {"fall": True, "spring": True}
-
-            # Timing
-            if course_code in timings:
-                timing_info = timings[course_code]
-                if timing_info.get("fall"):
-                    course_data["timing_fall"] = timing_info["fall"]
-                if timing_info.get("spring"):
-                    course_data["timing_spring"] = timing_info["spring"]
-
-            course_array.append(course_data)
-
-        # ⬅️ NEW: store subject_name at the subject header level
-        combined[subject] = {
-            "subject": subject_name,
-            "courses": course_array
-        }
-        print(f"✅ Processed {subject} ({subject_name}) → {len(course_array)} courses")
+def build_combined_json(name_cache_path=DEFAULT_NAME_CACHE_PATH, workers=1,
+                        manifest_path=DEFAULT_BUILD_MANIFEST_PATH, full=False,
+                        output_path=DEFAULT_OUTPUT_PATH, compact=False, shard_dir=None):
+    """Build UIC/data/combined.json.
 
-    os.makedirs("UIC/data", exist_ok=True)
-    output_path = "UIC/data/combined.json"
+    Only subjects whose TSVs or name changed since the last build are
+    re-assembled (all of them with full=True); the rest are copied from the
+    previous combined.json as recorded in the build manifest.
+    """
+    base_dir = "UIC/data/subjects"
+
+    # Load list of backfilled courses
+    credit_cache_path = DEFAULT_CREDIT_CACHE_PATH
+    backfilled_courses = load_backfilled_courses(credit_cache_path)
+
+    if not os.path.isdir(base_dir):
+        raise FileNotFoundError(f"Base directory not found: {base_dir}")
 
-    with open(output_path, "w") as f:
-        json.dump(combined, f, indent=2)
+    subjects = [s for s in sorted(os.listdir(base_dir)) if os.path.isdir(os.path.join(base_dir, s))]
+    # ⬅️ human-readable subject names, stored at the subject header level
+    subject_names = load_subject_names(subjects, name_cache_path)
 
-    print(f"\n🎉 combined.json saved with {len(combined)} subjects at {output_path}")
+    build_combined(base_dir, subjects, partial(build_subject_courses, backfilled_courses=backfilled_courses),
+                   output_path, manifest_path, names=subject_names,
+                   context={"credit_cache": file_sha256(credit_cache_path)},
+                   full=full, compact=compact, shard_dir=shard_dir, workers=workers)
 
 if __name__ == "__main__":
-    build_combined_json()
+    parser = argparse.ArgumentParser(description="Build UIC/data/combined.json from the per-subject files")
+    parser.add_argument("--name-cache", default=DEFAULT_NAME_CACHE_PATH,
+                        help="subject name cache written by the scraper (default: %(default)s)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="build subjects in this many worker processes "
+                             "(0 = one per CPU core, default: %(default)s)")
+    parser.add_argument("--manifest", default=DEFAULT_BUILD_MANIFEST_PATH,
+                        help="per-subject input hashes from the last build (default: %(default)s)")
+    parser.add_argument("--full", action="store_true",
+                        help="rebuild every subject, ignoring the manifest")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT_PATH,
+                        help="where to write the JSON; a .gz suffix gzips it (default: %(default)s)")
+    parser.add_argument("--compact", action="store_true",
+                        help="write compact JSON (no indentation; uses orjson when installed)")
+    parser.add_argument("--shards", nargs="?", const=DEFAULT_SHARD_DIR, metavar="DIR",
+                        help="also write one JSON file per subject plus manifest.json "
+                             "(default dir: %(const)s)")
+    args = parser.parse_args()
+    build_combined_json(args.name_cache, args.workers, args.manifest, args.full,
+                        args.output, args.compact, args.shards)
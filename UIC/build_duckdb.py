@@ -1,72 +1,80 @@
+import gzip
 import json
 import duckdb
 import os
+import argparse
+from time import perf_counter
+from duckdb_batch import ColumnBatch
+from duckdb_incremental import load_subjects
+from duckdb_layout import finish_catalog
+from export_parquet import export_parquet, DEFAULT_OUT_DIR as DEFAULT_PARQUET_DIR
+from build_combined_json import load_subject_names, load_backfilled_courses, DEFAULT_CREDIT_CACHE_PATH
+from subject_names import DEFAULT_NAME_CACHE_PATH
+
+DEFAULT_JSON_PATH = "UIC/data/combined.json"
+DEFAULT_DB_PATH = "UIC/data/combined.duckdb"
+DEFAULT_SUBJECTS_DIR = "UIC/data/subjects"
 
 def normalize_course_code(subject, course_number):
     """Pads subject and number to form an 8-character course code (e.g., CS___141)."""
     return f"{subject}{'_' * (8 - len(subject) - len(course_number))}{course_number}"
 
-# Load JSON
-with open("UIC/data/combined.json") as f:
-    data = json.load(f)
-
-# Recreate DB
-db_path = "UIC/data/combined.duckdb"
-if os.path.exists(db_path):
-    os.remove(db_path)
-con = duckdb.connect(db_path)
-
-# Create tables (add subjects + subject_name in courses)
-con.execute("""
-CREATE TABLE subjects (
-  subject TEXT PRIMARY KEY,
-  subject_name TEXT
-)""")
-
-con.execute("""
-CREATE TABLE courses (
-  subject TEXT,
-  subject_name TEXT,
-  course_id TEXT,
-  credits FLOAT,
-  offered_fall BOOLEAN,
-  offered_spring BOOLEAN
-)""")
-
-con.execute("""
-CREATE TABLE timings (
-  subject TEXT,
-  course_id TEXT,
-  term TEXT,
-  group_idx INT,
-  start INT,
-  end_time INT
-)""")
-
-con.execute("""
-CREATE TABLE prerequisites (
-  subject TEXT,
-  course_id TEXT,
-  prereq_id TEXT,
-  type INT
-)""")
-
-con.execute("""
-CREATE TABLE lecture_days (
-  subject TEXT,
-  course_id TEXT,
-  term TEXT,
-  group_idx INT,
-  days INT
-)""")
-
-# Insert data
-for subject, subject_data in data.items():
+
+def create_tables(con):
+    """Create the catalog tables (add subjects + subject_name in courses; timings and lecture_days keep the CRN)."""
+    con.execute("""
+    CREATE TABLE subjects (
+      subject TEXT PRIMARY KEY,
+      subject_name TEXT
+    )""")
+
+    con.execute("""
+    CREATE TABLE courses (
+      subject TEXT,
+      subject_name TEXT,
+      course_id TEXT,
+      credits FLOAT,
+      offered_fall BOOLEAN,
+      offered_spring BOOLEAN
+    )""")
+
+    con.execute("""
+    CREATE TABLE timings (
+      subject TEXT,
+      course_id TEXT,
+      term TEXT,
+      group_idx INT,
+      crn TEXT,
+      start INT,
+      end_time INT
+    )""")
+
+    con.execute("""
+    CREATE TABLE prerequisites (
+      subject TEXT,
+      course_id TEXT,
+      prereq_id TEXT,
+      type INT
+    )""")
+
+    con.execute("""
+    CREATE TABLE lecture_days (
+      subject TEXT,
+      course_id TEXT,
+      term TEXT,
+      group_idx INT,
+      crn TEXT,
+      days INT
+    )""")
+
+
+def add_subject(batch, subject, subject_data):
+    """Queue one combined.json subject entry ({"subject": name, "courses": [...]}) into `batch`."""
     # lowercased subject_name from JSON (fallback to subject code)
-    subject_name = (subject_data.get("subject_name") or subject).lower()
+    subject_name = (subject_data.get("subject") or subject).lower()
 
-    # insert into subjects table (idempotent insert per subject)
-    con.execute("INSERT INTO subjects VALUES (?, ?)", (subject, subject_name))
+    # subjects table (one row per subject)
+    batch.add("subjects", subject, subject_name)
 
     courses = subject_data.get("courses", [])
     for course in courses:
@@ -86,10 +94,7 @@ for subject, subject_data in data.items():
         fall = offered.get("fall", True)
         spring = offered.get("spring", True)
 
-        con.execute(
-            "INSERT INTO courses VALUES (?, ?, ?, ?, ?, ?)",
-            (subject, subject_name, course_id, credits, fall, spring),
-        )
+        batch.add("courses", subject, subject_name, course_id, credits, fall, spring)
 
         # prerequisites
         for prereq in course.get("prerequisites", []):
@@ -103,10 +108,7 @@ for subject, subject_data in data.items():
                 ptype = int(prereq.get("type", -1))
             except Exception:
                 ptype = -1
-            con.execute(
-                "INSERT INTO prerequisites VALUES (?, ?, ?, ?)",
-                (subject, course_id, normalized_prereq, ptype),
-            )
+            batch.add("prerequisites", subject, course_id, normalized_prereq, ptype)
 
         # timings (timing_fall / timing_spring)
         for term in ("fall", "spring"):
@@ -118,13 +120,11 @@ for subject, subject_data in data.items():
                 time_blocks = session.get("time", []) or []
                 if not isinstance(time_blocks, list) or len(time_blocks) == 0:
                     continue
+                crn = str(session.get("crn", "")).strip()
 
                 # lecture_days row (count pairs)
                 lecture_count = len(time_blocks) // 2
-                con.execute(
-                    "INSERT INTO lecture_days VALUES (?, ?, ?, ?, ?)",
-                    (subject, course_id, term, group_idx, lecture_count),
-                )
+                batch.add("lecture_days", subject, course_id, term, group_idx, crn, lecture_count)
 
                 # timings rows
                 for i in range(0, len(time_blocks), 2):
@@ -133,9 +133,205 @@ for subject, subject_data in data.items():
                         end = int(time_blocks[i + 1])
                     except Exception:
                         continue
-                    con.execute(
-                        "INSERT INTO timings VALUES (?, ?, ?, ?, ?, ?)",
-                        (subject, course_id, term, group_idx, start, end),
-                    )
+                    batch.add("timings", subject, course_id, term, group_idx, crn, start, end)
+
+
+def build_duckdb(subjects, db_path=DEFAULT_DB_PATH, incremental=False, swap=False):
+    """Load (subject, subject_data) pairs, e.g. combined.json items, into `db_path`.
+
+    Rows are gathered per table and bulk-inserted in a single transaction.
+    incremental=True re-inserts only the subjects whose entry changed;
+    swap=True builds on a copy and renames it into place (duckdb_incremental.py).
+    Returns {"inserted": {table: rows}, "changed": [...], "removed": [...]}.
+    """
+    return load_subjects(subjects, db_path, create_tables, add_subject, incremental, swap)
+
+
+# ===================== TSV mode =====================
+#
+# Builds the same tables straight from the per-subject TSVs with DuckDB's
+# (parallel) CSV reader, skipping combined.json. Every step mirrors what
+# tsv_loader + build_combined_json + add_subject do in Python:
+#   - codes are normalized like tsv_loader.normalize_code
+#   - duplicate master-list / offering rows: the last one wins
+#   - a coursetiming row is split into (crn, start, end) triplets; incomplete
+#     or non-numeric triplets are dropped and the rest are grouped per CRN in
+#     order of appearance, one group_idx per (course, term) group
+#   - only courses in the master list get prerequisites and timings
+# Rows are inserted in the same order as the JSON path.
+
+def _lines_sql(files_param):
+    """One row per line of the files in `files_param`: subject, line number, tab-split fields."""
+    return f"""
+    SELECT regexp_extract(filename, '_([^_/\\\\]+)\\.txt$', 1) AS subject,
+           ord,
+           string_split(regexp_replace(line, '^\\s+|\\s+$', '', 'g'), chr(9)) AS parts
+    FROM read_csv(${files_param}, columns = {{'line': 'VARCHAR'}}, delim = chr(1), quote = '', escape = '',
+                  header = false, auto_detect = false, filename = true) WITH ORDINALITY AS t(line, filename, ord)
+    """
+
+
+def _norm(expr):
+    # tsv_loader.normalize_code: strip, then pad to 8 with '_'
+    return f"CASE WHEN length(trim({expr})) >= 8 THEN trim({expr}) ELSE rpad(trim({expr}), 8, '_') END"
+
+
+def _course_id(subject, code):
+    # normalize_course_code(subject, code[-3:])
+    return f"{subject} || repeat('_', greatest(0, 5 - length({subject}))) || right({code}, 3)"
+
+
+def _execute(con, query, params):
+    # DuckDB rejects named parameters a statement doesn't use
+    return con.execute(query, {name: value for name, value in params.items() if f"${name}" in query})
+
+
+def build_duckdb_from_tsv(base_dir=DEFAULT_SUBJECTS_DIR, db_path=DEFAULT_DB_PATH,
+                          name_cache_path=DEFAULT_NAME_CACHE_PATH, credit_cache_path=DEFAULT_CREDIT_CACHE_PATH,
+                          swap=False):
+    """Recreate `db_path` from the TSVs under `base_dir` with SQL. Returns {table: rows inserted}.
+
+    swap=True builds <db_path>.tmp and renames it over `db_path` at the end.
+    """
+    kinds = ("mastercourselist", "prerequisites", "courseoffering", "coursetiming")
+    subjects = [
+        s for s in sorted(os.listdir(base_dir))
+        if all(os.path.exists(os.path.join(base_dir, s, f"{kind}_{s}.txt")) for kind in kinds)
+    ]
+    files = {kind: [os.path.join(base_dir, s, f"{kind}_{s}.txt").replace(os.sep, "/") for s in subjects]
+             for kind in kinds}
+    names = load_subject_names(subjects, name_cache_path)
+
+    target = f"{db_path}.tmp" if swap else db_path
+    for path in (target, f"{target}.wal"):
+        if os.path.exists(path):
+            os.remove(path)
+    con = duckdb.connect(target)
+    try:
+        create_tables(con)
+        batch = ColumnBatch(con, tables={"subjects"})
+        for subject in subjects:
+            batch.add("subjects", subject, (names[subject] or subject).lower())
+
+        con.begin()
+        inserted = batch.flush(con)
+        params = dict(files, backfilled=sorted(load_backfilled_courses(credit_cache_path)))
+        # Staging tables (dropped with the connection)
+        for query in (
+            f"""
+             CREATE TEMP TABLE master AS
+             SELECT subject, code, arg_max(credit, ord) AS credit
+             FROM (SELECT subject, ord, {_norm("parts[1]")} AS code, parts[2] AS credit
+                   FROM ({_lines_sql("mastercourselist")}) WHERE len(parts) = 2)
+             GROUP BY subject, code""",
+            f"""
+             CREATE TEMP TABLE offerings AS
+             SELECT subject, code, arg_max(fall, ord) AS fall, arg_max(spring, ord) AS spring
+             FROM (SELECT subject, ord, {_norm("parts[1]")} AS code, parts[2] = '1' AS fall, parts[3] = '1' AS spring
+                   FROM ({_lines_sql("courseoffering")}) WHERE len(parts) = 3)
+             GROUP BY subject, code""",
+            # coursetiming unpivoted: one row per (crn, start, end) triplet of every fall/spring row
+            f"""
+             CREATE TEMP TABLE timing_triplets AS
+             SELECT * FROM (
+                 SELECT subject, ord, code, term, k,
+                        triplets[3 * k + 1] AS crn,
+                        TRY_CAST(triplets[3 * k + 2] AS INTEGER) AS start,
+                        TRY_CAST(triplets[3 * k + 3] AS INTEGER) AS end_time
+                 FROM (SELECT subject, ord, {_norm("parts[1]")} AS code, lower(trim(parts[2])) AS term,
+                              parts[5:] AS triplets,
+                              unnest(range(0, (len(parts) - 4 + 2) // 3)) AS k
+                       FROM ({_lines_sql("coursetiming")})
+                       WHERE len(parts) >= 4 AND lower(trim(parts[2])) IN ('fall', 'spring'))
+             ) WHERE start IS NOT NULL AND end_time IS NOT NULL""",
+            # one group per (row, CRN), numbered per (course, term) in order of appearance
+            """
+             CREATE TEMP TABLE timing_groups AS
+             SELECT subject, code, term, ord, crn,
+                    row_number() OVER (PARTITION BY subject, code, term ORDER BY ord, min(k)) - 1 AS group_idx,
+                    count(*) AS days
+             FROM timing_triplets
+             GROUP BY subject, code, term, ord, crn""",
+        ):
+            _execute(con, query, params)
+
+        for table, query in (
+            ("courses", f"""
+             SELECT m.subject, s.subject_name, {_course_id("m.subject", "m.code")},
+                    CAST(CAST(list_filter(list_transform(string_split(m.credit, ','), c -> trim(c)),
+                                          c -> regexp_full_match(c, '\\d+\\.?\\d*|\\.\\d+'))[1] AS DOUBLE) AS FLOAT),
+                    CASE WHEN o.code IS NOT NULL THEN o.fall WHEN list_contains($backfilled, m.code) THEN false ELSE true END,
+                    CASE WHEN o.code IS NOT NULL THEN o.spring WHEN list_contains($backfilled, m.code) THEN false ELSE true END
+             FROM master m JOIN subjects s USING (subject)
+             LEFT JOIN offerings o ON o.subject = m.subject AND o.code = m.code
+             ORDER BY m.subject, m.code"""),
+            ("prerequisites", f"""
+             SELECT p.subject, {_course_id("p.subject", "p.course")},
+                    rtrim(left(p.prereq, length(p.prereq) - 3), '_')
+                      || repeat('_', greatest(0, 5 - length(rtrim(left(p.prereq, length(p.prereq) - 3), '_'))))
+                      || right(p.prereq, 3),
+                    coalesce(TRY_CAST(trim(p.flag) AS INTEGER), -1)
+             FROM (SELECT subject, ord, {_norm("parts[1]")} AS prereq, {_norm("parts[2]")} AS course, parts[3] AS flag
+                   FROM ({_lines_sql("prerequisites")}) WHERE len(parts) = 3) p
+             JOIN master m ON m.subject = p.subject AND m.code = p.course
+             ORDER BY p.subject, p.course, p.ord"""),
+            ("lecture_days", f"""
+             SELECT g.subject, {_course_id("g.subject", "g.code")}, g.term, g.group_idx, trim(g.crn), g.days
+             FROM timing_groups g JOIN master m ON m.subject = g.subject AND m.code = g.code
+             ORDER BY g.subject, g.code, g.term, g.group_idx"""),
+            ("timings", f"""
+             SELECT t.subject, {_course_id("t.subject", "t.code")}, t.term, g.group_idx, trim(t.crn), t.start, t.end_time
+             FROM timing_triplets t
+             JOIN timing_groups g USING (subject, code, term, ord, crn)
+             JOIN master m ON m.subject = t.subject AND m.code = t.code
+             ORDER BY t.subject, t.code, t.term, g.group_idx, t.k"""),
+        ):
+            inserted[table] = _execute(con, f"INSERT INTO {table} {query}", params).fetchone()[0]
+        finish_catalog(con)
+        con.commit()
+    finally:
+        con.close()
+    if swap:
+        os.replace(target, db_path)
+    return inserted
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build UIC/data/combined.duckdb")
+    parser.add_argument("--json", default=DEFAULT_JSON_PATH,
+                        help="combined.json to load, optionally gzipped (.gz) (default: %(default)s)")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH,
+                        help="DuckDB file to (re)create (default: %(default)s)")
+    parser.add_argument("--from-tsv", nargs="?", const=DEFAULT_SUBJECTS_DIR, metavar="DIR",
+                        help="build straight from the per-subject TSVs with DuckDB's CSV reader "
+                             "instead of combined.json (default dir: %(const)s)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="only delete and re-insert subjects whose entry changed since the last build")
+    parser.add_argument("--swap", action="store_true",
+                        help="build on a copy and rename it into place, so open readers are never interrupted")
+    parser.add_argument("--parquet", nargs="?", const=DEFAULT_PARQUET_DIR, metavar="DIR",
+                        help="also export the finished catalog to partitioned Parquet "
+                             "(see export_parquet.py; default dir: %(const)s)")
+    args = parser.parse_args()
+    if args.from_tsv and args.incremental:
+        parser.error("--incremental needs combined.json input; it cannot be combined with --from-tsv")
 
-print("✅ UIC DuckDB built with lowercased subject_name in subjects and courses")
+    started = perf_counter()
+    if args.from_tsv:
+        inserted = build_duckdb_from_tsv(args.from_tsv, args.db, swap=args.swap)
+        print("✅ UIC DuckDB built with lowercased subject_name in subjects and courses")
+    else:
+        # Load JSON
+        # combined.json, or combined.json.gz (--output ...gz)
+        with (gzip.open if args.json.endswith(".gz") else open)(args.json, "rt") as f:
+            data = json.load(f)
+        result = build_duckdb(data.items(), args.db, incremental=args.incremental, swap=args.swap)
+        inserted = result["inserted"]
+        if args.incremental:
+            print(f"✅ UIC DuckDB updated: {len(result['changed'])} changed, {len(result['removed'])} removed subjects")
+        else:
+            print("✅ UIC DuckDB built with lowercased subject_name in subjects and courses")
+    print(f"⏱️ {', '.join(f'{table} {rows}' for table, rows in inserted.items()) or 'no'} rows "
+          f"in {perf_counter() - started:.2f}s")
+    if args.parquet:
+        export_parquet(args.db, args.parquet)
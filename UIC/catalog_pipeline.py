@@ -0,0 +1,158 @@
+import os
+import threading
+from time import perf_counter
+
+import duckdb
+
+from build_combined_json import (
+    build_subject_courses, courses_from_rows, load_backfilled_courses,
+    DEFAULT_BUILD_MANIFEST_PATH, DEFAULT_CREDIT_CACHE_PATH,
+)
+from build_duckdb import add_subject, create_tables
+from duckdb_batch import ColumnBatch
+from duckdb_incremental import STATE_TABLE, create_state_table, subject_digest
+from duckdb_layout import finish_catalog
+from export_parquet import export_parquet
+from incremental_json import BuildManifest, encode_fragment, file_sha256
+
+# In-process scrape → combined.json → DuckDB.
+#
+# scrape_subject_links.py --json/--duckdb hands each subject's parsed rows
+# (subject_rows) to a CatalogSink as soon as the subject is parsed. The sink
+# assembles the course array with the same code build_combined_json.py uses,
+# streams it into the JSON document and queues its DuckDB rows (bulk-inserted
+# at the end, like build_duckdb.py does), so nothing is written to or re-read
+# from TSV files in between (--no-tsv skips them entirely).
+#
+# Subjects arrive out of order when parsing runs in worker processes; the sink
+# buffers them and emits in sorted subject order, so the JSON matches what
+# build_combined_json.py writes. Subjects not parsed in this run (unchanged
+# or resumed) are read from their existing TSVs instead.
+#
+# The JSON comes with the same build manifest build_combined_json.py keeps
+# (combined_manifest.json), so its next run only rebuilds what changed since.
+# Subjects parsed with tsv=False (--no-tsv) get no input hash there, since
+# their TSVs on disk may be older than the JSON; the next build re-assembles
+# them from those TSVs.
+#
+# With parquet_dir, the finished DuckDB catalog is also exported to
+# partitioned Parquet (export_parquet.py).
+
+
+class CatalogSink:
+    """Streams scraped subjects into a JSON document and/or a DuckDB catalog.
+
+    Both outputs are built under a temporary name and renamed into place by
+    close(); abort() discards them. `name_of(subject)` supplies display names;
+    `tsv` says whether parsed subjects were also written to their TSVs.
+    """
+
+    def __init__(self, subjects, json_path=None, db_path=None, compact=False, name_of=None,
+                 base_dir="UIC/data/subjects", credit_cache_path=DEFAULT_CREDIT_CACHE_PATH,
+                 parquet_dir=None, manifest_path=DEFAULT_BUILD_MANIFEST_PATH, tsv=True):
+        self.order = sorted(subjects)
+        self.json_path = json_path
+        self.db_path = db_path
+        self.parquet_dir = parquet_dir
+        self.name_of = name_of or (lambda subject: None)
+        self.base_dir = base_dir
+        self.backfilled_courses = load_backfilled_courses(credit_cache_path)
+        self.tsv = tsv
+        self.expected = set()
+        self.written = 0
+        self.from_tsv = 0
+        self.started = perf_counter()
+        self._next = 0
+        self._ready = {}
+        self._lock = threading.Lock()
+
+        self._manifest = self._writer = None
+        if json_path:
+            # Same context as build_combined_json.py, so it can pick up from this document
+            self._manifest = BuildManifest(manifest_path, json_path, compact=compact,
+                                           context={"credit_cache": file_sha256(credit_cache_path)})
+            self._writer = self._manifest.open_writer()
+        self._con = None
+        if db_path:
+            self._db_tmp_path = f"{db_path}.tmp"
+            for path in (self._db_tmp_path, f"{self._db_tmp_path}.wal"):
+                if os.path.exists(path):
+                    os.remove(path)
+            self._con = duckdb.connect(self._db_tmp_path)
+            create_tables(self._con)
+            create_state_table(self._con)  # so build_duckdb.py --incremental can update it later
+            self._batch = ColumnBatch(self._con)
+
+    def expect(self, subjects):
+        """Subjects whose rows will be put() in this run; the rest come from TSVs."""
+        with self._lock:
+            self.expected.update(subjects)
+
+    def put(self, subject, rows=None):
+        """Hand over a parsed subject (rows=None: read it from its TSVs)."""
+        with self._lock:
+            self._ready[subject] = rows
+            self._flush()
+
+    def _flush(self, drain=False):
+        while self._next < len(self.order):
+            subject = self.order[self._next]
+            if subject in self._ready:
+                rows = self._ready.pop(subject)
+            elif drain or subject not in self.expected:
+                rows = None
+            else:
+                break
+            self._emit(subject, rows)
+            self._next += 1
+
+    def _emit(self, subject, rows):
+        if rows is not None:
+            course_array = courses_from_rows(rows, self.backfilled_courses)
+        else:
+            course_array = build_subject_courses(subject, os.path.join(self.base_dir, subject),
+                                                 self.backfilled_courses)
+            if course_array is None:
+                print(f"⚠️ Catalog: skipping {subject}: not parsed and no TSVs on disk")
+                return
+            self.from_tsv += 1
+
+        subject_name = self.name_of(subject) or subject.lower()
+        subject_value = {"subject": subject_name, "courses": course_array}
+        if self._writer is not None:
+            if rows is None or self.tsv:
+                self._manifest.input_digest(self.base_dir, subject)
+            fragment = encode_fragment(subject, subject_value, self._writer.compact)
+            self._manifest.add(self._writer, subject, fragment, subject_name)
+        if self._con is not None:
+            add_subject(self._batch, subject, subject_value)
+            self._batch.add(STATE_TABLE, subject, subject_digest(subject_value))
+        self.written += 1
+
+    def close(self):
+        """Emit anything still pending, then move both outputs into place."""
+        with self._lock:
+            self._flush(drain=True)
+        if self._writer is not None:
+            self._manifest.finish(self._writer)  # also writes the byte-offset index
+        if self._con is not None:
+            # Every table in one bulk insert, in one transaction
+            self._con.begin()
+            self._batch.flush(self._con)
+            finish_catalog(self._con)
+            self._con.commit()
+            self._con.close()
+            os.replace(self._db_tmp_path, self.db_path)
+        outputs = " and ".join(p for p in (self.json_path, self.db_path) if p)
+        print(f"📦 Catalog: {self.written} subjects → {outputs} "
+              f"({self.from_tsv} from existing TSVs, {perf_counter() - self.started:.1f}s)")
+        if self.parquet_dir and self.db_path:
+            export_parquet(self.db_path, self.parquet_dir)
+
+    def abort(self):
+        if self._writer is not None:
+            self._writer.abort()
+        if self._con is not None:
+            self._con.close()
+            if os.path.exists(self._db_tmp_path):
+                os.remove(self._db_tmp_path)
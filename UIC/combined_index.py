@@ -0,0 +1,143 @@
+import hashlib
+import json
+import mmap
+import os
+from functools import lru_cache
+
+try:
+    import orjson
+except ImportError:  # optional fast parser
+    orjson = None
+
+# Byte-offset index for random access into a single combined.json / uis.json.
+#
+# The builders write <output>.index.json next to every uncompressed document:
+#
+#   {"document": "combined.json", "size": ..., "sha256": ...,
+#    "subjects": {"AAST": [offset, length], "ACTG": [...], ...}}
+#
+# where [offset, length] is the byte range of that subject's value ({"subject",
+# "courses"}). LazyCatalog memory-maps the document and decodes a subject only
+# when it is first asked for, keeping the most recently used ones decoded:
+#
+#   from combined_index import LazyCatalog
+#   with LazyCatalog("UIC/data/combined.json") as catalog:
+#       catalog["CS"]["courses"]
+#       catalog.course("MATH_180")
+
+DEFAULT_CACHE_SIZE = 32
+
+
+def _loads(data):
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+def index_path_for(document_path):
+    """UIC/data/combined.json → UIC/data/combined.index.json."""
+    root, _ = os.path.splitext(document_path)
+    return f"{root}.index.json"
+
+
+def value_span(fragment, offset):
+    """(offset, length) of the value inside a document fragment written at `offset`."""
+    value = fragment.split(b":", 1)[1].lstrip()
+    return offset + len(fragment) - len(value), len(value)
+
+
+def write_index(document_path, size, sha256, spans):
+    """Write the index for `document_path` atomically.
+
+    `spans` is [(subject, offset, length), ...] in document order.
+    """
+    index = {
+        "document": os.path.basename(document_path),
+        "size": size,
+        "sha256": sha256,
+        "subjects": {subject: [offset, length] for subject, offset, length in spans},
+    }
+    path = index_path_for(document_path)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(index, f, indent=2)
+    os.replace(tmp_path, path)
+    return path
+
+
+def course_subject(course_id):
+    """Subject code of a course id: "CS___141" → "CS", "MATH_180" → "MATH"."""
+    return course_id.rstrip("0123456789").rstrip("_")
+
+
+class LazyCatalog:
+    """Read-only, subject-keyed view of a combined document via its index.
+
+    Decoded subjects are shared between callers; treat them as read-only.
+    Raises ValueError if the document no longer matches its index (size, or
+    SHA-256 too with verify=True) — rebuild it to refresh the index.
+    """
+
+    def __init__(self, document_path, index_path=None, cache_size=DEFAULT_CACHE_SIZE, verify=False):
+        self.document_path = document_path
+        with open(index_path or index_path_for(document_path)) as f:
+            index = json.load(f)
+        self._spans = index["subjects"]
+
+        self._file = open(document_path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        if size != index["size"]:
+            self._file.close()
+            raise ValueError(f"{document_path} does not match its index (size {size} != {index['size']})")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        if verify and hashlib.sha256(self._map).hexdigest() != index["sha256"]:
+            self.close()
+            raise ValueError(f"{document_path} does not match its index (SHA-256 differs)")
+
+        self._decode = lru_cache(maxsize=cache_size)(self._decode_subject)
+
+    def _decode_subject(self, subject):
+        offset, length = self._spans[subject]
+        return _loads(self._map[offset:offset + length])
+
+    def __getitem__(self, subject):
+        if subject not in self._spans:
+            raise KeyError(subject)
+        return self._decode(subject)
+
+    def get(self, subject, default=None):
+        return self[subject] if subject in self._spans else default
+
+    def __contains__(self, subject):
+        return subject in self._spans
+
+    def __iter__(self):
+        return iter(self._spans)
+
+    def __len__(self):
+        return len(self._spans)
+
+    def subjects(self):
+        return list(self._spans)
+
+    def course(self, course_id):
+        """One course dict by id ("CS___141"), decoding only its subject. None if unknown."""
+        subject = self.get(course_subject(course_id))
+        if subject is None:
+            return None
+        for course in subject["courses"]:
+            if course["id"] == course_id:
+                return course
+        return None
+
+    def cache_info(self):
+        return self._decode.cache_info()
+
+    def close(self):
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
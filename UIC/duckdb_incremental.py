@@ -0,0 +1,154 @@
+import hashlib
+import json
+import os
+import shutil
+
+import duckdb
+
+from duckdb_batch import ColumnBatch
+from duckdb_layout import finish_catalog
+
+# Incremental loads and atomic swaps for the DuckDB catalogs
+# (combined.duckdb, uis.duckdb).
+#
+# Every build records a SHA-256 of each subject's JSON entry in a small
+# `subject_digests` table. With incremental=True only subjects whose entry
+# changed (or that disappeared) are touched: their rows are deleted from every
+# table that has a `subject` column and re-inserted, in one transaction, so a
+# reader never sees a half-updated subject. The first incremental run against
+# a database without digests rewrites every subject once. Only the derived
+# rows of the updated subjects are rewritten and nothing is re-sorted
+# (duckdb_layout.finish_catalog), so an update costs what changed.
+#
+# With swap=True the work happens on a copy (<db>.tmp) that is renamed over
+# the database at the end. DuckDB holds a file lock while writing, so an
+# in-place update fails while another process has the database open; with
+# the swap, open readers keep the old file and new connections get the new
+# one, with no window where the catalog is missing.
+#
+# Digests only cover the input, not the builder: after changing what a
+# builder emits, run it once without incremental=True. A database whose
+# tables have different columns than the builder creates is rebuilt in full.
+
+STATE_TABLE = "subject_digests"
+
+
+def subject_digest(subject_data):
+    return hashlib.sha256(json.dumps(subject_data, sort_keys=True).encode()).hexdigest()
+
+
+def _remove(*paths):
+    for path in paths:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def _subject_tables(con):
+    return [
+        table for (table,) in con.execute(
+            "SELECT DISTINCT table_name FROM information_schema.columns JOIN information_schema.tables "
+            "USING (table_schema, table_name) "
+            "WHERE column_name = 'subject' AND table_type = 'BASE TABLE' AND table_name <> ? ORDER BY table_name",
+            [STATE_TABLE],
+        ).fetchall()
+    ]
+
+
+def _schema(con, tables=None):
+    return [
+        row for row in con.execute(
+            "SELECT table_name, column_name, data_type FROM information_schema.columns "
+            "ORDER BY table_name, ordinal_position").fetchall()
+        if tables is None or row[0] in tables
+    ]
+
+
+def _schema_matches(con, create_tables):
+    """True if `con` has the tables create_tables() makes, with the same columns."""
+    expected = duckdb.connect()
+    create_tables(expected)
+    wanted = _schema(expected)
+    expected.close()
+    return _schema(con, {table for table, _, _ in wanted}) == wanted
+
+
+def create_state_table(con):
+    con.execute(f"CREATE TABLE IF NOT EXISTS {STATE_TABLE} (subject TEXT PRIMARY KEY, digest TEXT)")
+
+
+def load_subjects(subjects, db_path, create_tables, add_subject, incremental=False, swap=False):
+    """Load (subject, subject_data) pairs into `db_path`.
+
+    `create_tables(con)` creates the schema and `add_subject(batch, subject,
+    subject_data)` queues a subject's rows, as in build_duckdb.py. Without
+    incremental=True the database is rebuilt from scratch.
+
+    Returns {"inserted": {table: rows}, "changed": [...], "removed": [...]}.
+    """
+    subjects = list(subjects)
+    digests = {subject: subject_digest(subject_data) for subject, subject_data in subjects}
+
+    target = f"{db_path}.tmp" if swap else db_path
+    _remove(f"{db_path}.tmp", f"{db_path}.tmp.wal")
+    existing = incremental and os.path.exists(db_path)
+    if existing and swap:
+        shutil.copyfile(db_path, target)
+        if os.path.exists(f"{db_path}.wal"):
+            shutil.copyfile(f"{db_path}.wal", f"{target}.wal")
+    elif not existing:
+        _remove(target, f"{target}.wal")
+
+    con = duckdb.connect(target)
+    if existing and not _schema_matches(con, create_tables):
+        print(f"ℹ️ {db_path} was built with an older schema; rebuilding every subject")
+        con.close()
+        _remove(target, f"{target}.wal")
+        existing = False
+        con = duckdb.connect(target)
+    try:
+        if existing:
+            tables = {table for (table,) in con.execute(
+                "SELECT table_name FROM information_schema.tables").fetchall()}
+            if STATE_TABLE in tables:
+                previous = dict(con.execute(f"SELECT subject, digest FROM {STATE_TABLE}").fetchall())
+            else:
+                # Built before digests were recorded: every subject counts as changed
+                previous = dict.fromkeys(s for (s,) in con.execute("SELECT subject FROM subjects").fetchall())
+                create_state_table(con)
+        else:
+            create_tables(con)
+            create_state_table(con)
+            previous = {}
+
+        changed = [subject for subject in digests if previous.get(subject) != digests[subject]]
+        removed = sorted(set(previous) - set(digests))
+        changed_set = set(changed)
+
+        batch = ColumnBatch(con)
+        for subject, subject_data in subjects:
+            if subject in changed_set:
+                add_subject(batch, subject, subject_data)
+                batch.add(STATE_TABLE, subject, digests[subject])
+
+        # Delete + re-insert in one transaction
+        con.begin()
+        stale = changed + removed
+        if existing and stale:
+            for table in _subject_tables(con) + [STATE_TABLE]:
+                con.execute(f"DELETE FROM {table} WHERE subject = ANY(?::VARCHAR[])", [stale])
+        inserted = batch.flush(con)
+        inserted.pop(STATE_TABLE, None)
+        if inserted or removed:
+            finish_catalog(con, stale if existing else None)
+        con.commit()
+    except BaseException:
+        con.close()
+        if swap:
+            _remove(target, f"{target}.wal")
+        raise
+    con.close()
+
+    if swap:
+        _remove(f"{db_path}.wal")  # belongs to the old file
+        os.replace(target, db_path)
+    return {"inserted": inserted, "changed": changed, "removed": removed}
@@ -0,0 +1,94 @@
+from prereq_closure import build_prereq_closure
+from section_conflicts import build_section_conflicts
+
+# Physical layout of the DuckDB catalogs (combined.duckdb, uis.duckdb).
+#
+# Applied by every builder after its rows are inserted (finish_catalog, which
+# first rebuilds the derived tables):
+#   - the per-course tables are rewritten sorted by (subject, course_id, term),
+#     so each row group covers a narrow key range and DuckDB's min/max zone
+#     maps skip the rest on filtered scans; ties keep their insertion order
+#     (rowid), so prerequisite and meeting order is unchanged
+#   - ART indexes on course_id (and prereq_id) turn point lookups into index
+#     scans instead of full table scans. DuckDB only uses them for a single
+#     equality filter (course_id = ?, not course_id = ? AND term = ?), so the
+#     pattern tables of section_conflicts.py, only ever joined or filtered on
+#     several columns, have none.
+#   - views for the common joins:
+#       course_sections        one row per course section, with its meetings
+#       reverse_prerequisites  course_id → the courses it is a prerequisite of
+#
+# Both schemas share these columns, including crn in timings and
+# lecture_days, which course_sections passes through. See bench_lookups.py
+# for point-lookup timings. At the current size each table fits in one row
+# group (122,880 rows), so the sort does not skip anything yet; it costs
+# ~35 ms per full build.
+
+SORT_KEYS = {
+    "courses": "subject, course_id",
+    "prerequisites": "subject, course_id",
+    "timings": "subject, course_id, term, group_idx",
+    "lecture_days": "subject, course_id, term, group_idx",
+    "prereq_closure": "course_id, depth, ancestor_id",
+    "prereq_descendants": "course_id, depth, descendant_id",
+    "meeting_patterns": "pattern_id",
+    "section_patterns": "term, course_id, group_idx",
+    "pattern_conflicts": "pattern_a, pattern_b",
+}
+
+INDEXES = {
+    "courses": ("course_id",),
+    "prerequisites": ("course_id", "prereq_id"),
+    "timings": ("course_id",),
+    "lecture_days": ("course_id",),
+    "prereq_closure": ("course_id",),
+    "prereq_descendants": ("course_id",),
+}
+
+VIEWS = {
+    "course_sections": """
+        SELECT c.subject, c.subject_name, c.course_id, c.credits, c.offered_fall, c.offered_spring,
+               l.* EXCLUDE (subject, course_id),
+               (SELECT list({'start': t.start, 'end_time': t.end_time} ORDER BY t.start, t.end_time)
+                FROM timings t
+                WHERE t.course_id = l.course_id AND t.term = l.term AND t.group_idx = l.group_idx) AS meetings
+        FROM courses c
+        LEFT JOIN lecture_days l ON l.course_id = c.course_id
+    """,
+    "reverse_prerequisites": """
+        SELECT prereq_id AS course_id, course_id AS unlocks_id, subject AS unlocks_subject, type
+        FROM prerequisites
+    """,
+}
+
+
+def optimize_layout(con, resort=True):
+    """Sort, index and add the views to the catalog tables in `con`.
+
+    resort=False (incremental updates) leaves the row order alone: updated
+    subjects were appended, which keeps the zone maps close enough, and the
+    existing indexes were maintained by the inserts. Missing indexes and the
+    views are still created.
+    """
+    tables = {table for (table,) in con.execute("SELECT table_name FROM information_schema.tables").fetchall()}
+    for table, order_by in SORT_KEYS.items():
+        if table not in tables:
+            continue
+        if resort:
+            # CREATE OR REPLACE drops the old indexes; they are rebuilt on the sorted table below
+            con.execute(f"CREATE OR REPLACE TABLE {table} AS SELECT * FROM {table} ORDER BY {order_by}, rowid")
+        for column in INDEXES.get(table, ()):
+            con.execute(f"CREATE INDEX IF NOT EXISTS {table}_{column}_idx ON {table} ({column})")
+    for view, query in VIEWS.items():
+        con.execute(f"CREATE OR REPLACE VIEW {view} AS {query}")
+
+
+def finish_catalog(con, subjects=None):
+    """Update the derived tables (prereq_closure.py, section_conflicts.py), then sort, index and add views.
+
+    `subjects`: the subjects an incremental load replaced, so only their
+    derived rows are rewritten and nothing is re-sorted; None for a full build.
+    """
+    build_prereq_closure(con, subjects)
+    build_section_conflicts(con, subjects)
+    optimize_layout(con, resort=subjects is None)
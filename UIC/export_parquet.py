@@ -0,0 +1,111 @@
+import argparse
+import os
+import shutil
+import time
+
+import duckdb
+
+# Columnar export of the DuckDB catalog (combined.duckdb / uis.duckdb).
+#
+# Writes one zstd-compressed Parquet dataset per table, with the same columns
+# build_duckdb.py creates, hive-partitioned by subject (and term where the
+# table has one):
+#
+#   UIC/data/parquet/courses/subject=CS/data_0.parquet
+#   UIC/data/parquet/timings/subject=CS/term=fall/data_0.parquet
+#
+# Partition columns are also kept inside each file, so a single file is
+# self-describing. Readers can prune by path and scan only the columns they
+# need, e.g. in DuckDB:
+#
+#   SELECT course_id, start, end_time
+#   FROM read_parquet('UIC/data/parquet/timings/*/*/*.parquet', hive_partitioning = true)
+#   WHERE subject = 'CS' AND term = 'fall'
+#
+# or pyarrow.dataset.dataset("UIC/data/parquet/timings", partitioning="hive").
+#
+# The DuckDB builders and the scrape pipeline run this at the end of a build
+# with --parquet [DIR].
+
+DEFAULT_DB_PATH = "UIC/data/combined.duckdb"
+DEFAULT_OUT_DIR = "UIC/data/parquet"
+
+# table → (partition columns, sort order within the export)
+TABLES = {
+    "subjects": ((), "subject"),
+    "courses": (("subject",), "subject, course_id"),
+    "prerequisites": (("subject",), "subject, course_id, prereq_id"),
+    "timings": (("subject", "term"), "subject, term, course_id, group_idx, start"),
+    "lecture_days": (("subject", "term"), "subject, term, course_id, group_idx"),
+}
+
+
+def _publish(tmp_dir, out_dir):
+    """Move the finished export at `tmp_dir` to `out_dir`, keeping the old one until it is in place."""
+    old_dir = f"{out_dir}.old"
+    shutil.rmtree(old_dir, ignore_errors=True)
+    if os.path.exists(out_dir):
+        os.replace(out_dir, old_dir)
+    os.replace(tmp_dir, out_dir)
+    shutil.rmtree(old_dir, ignore_errors=True)
+
+
+def export_parquet(db_path=DEFAULT_DB_PATH, out_dir=DEFAULT_OUT_DIR):
+    """Export every catalog table to <out_dir>/<table>/ as partitioned Parquet.
+
+    The new export is written to <out_dir>.tmp. When it is complete, the old
+    export is renamed to <out_dir>.old, the new one is renamed into place, and
+    only then is the old one deleted. A half-written export is never visible.
+    If a run dies between the two renames, the next run restores <out_dir>.old.
+    """
+    if not os.path.exists(db_path):
+        raise FileNotFoundError(f"DuckDB catalog not found: {db_path} (run the DuckDB builder first)")
+    if not os.path.exists(out_dir) and os.path.exists(f"{out_dir}.old"):
+        os.replace(f"{out_dir}.old", out_dir)  # interrupted swap
+
+    tmp_dir = f"{out_dir}.tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    con = duckdb.connect(db_path, read_only=True)
+    existing = {row[0] for row in con.execute("SELECT table_name FROM information_schema.tables").fetchall()}
+    try:
+        for table, (partition_by, order_by) in TABLES.items():
+            if table not in existing:
+                print(f"⚠️ Skipping {table}: not in {db_path}")
+                continue
+            started = time.perf_counter()
+            rows = con.execute(f"SELECT count(*) FROM {table}").fetchone()[0]
+            if partition_by:
+                target = os.path.join(tmp_dir, table)
+                options = f"PARTITION_BY ({', '.join(partition_by)}), WRITE_PARTITION_COLUMNS true, "
+            else:
+                os.makedirs(os.path.join(tmp_dir, table))
+                target = os.path.join(tmp_dir, table, "data_0.parquet")
+                options = ""
+            con.execute(
+                f"COPY (SELECT * FROM {table} ORDER BY {order_by}) TO '{target}' "
+                f"(FORMAT parquet, {options}COMPRESSION zstd)"
+            )
+            print(f"✅ {table}: {rows} rows → {time.perf_counter() - started:.2f}s")
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+    finally:
+        con.close()
+
+    _publish(tmp_dir, out_dir)
+
+    size = sum(os.path.getsize(os.path.join(root, name))
+               for root, _, files in os.walk(out_dir) for name in files)
+    print(f"\n🎉 Parquet export saved at {out_dir} ({size / 1e6:.1f} MB)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export the DuckDB catalog to partitioned Parquet (zstd)")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH,
+                        help="DuckDB catalog to export (default: %(default)s)")
+    parser.add_argument("--out", default=DEFAULT_OUT_DIR,
+                        help="output directory, replaced on success (default: %(default)s)")
+    args = parser.parse_args()
+    export_parquet(args.db, args.out)
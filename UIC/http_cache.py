@@ -0,0 +1,130 @@
+import gzip
+import hashlib
+import json
+import os
+import threading
+from dataclasses import dataclass
+
+import http_client
+
+# On-disk response cache for static schedule pages.
+# Bodies are stored gzip-compressed next to an index of validators
+# (ETag / Last-Modified) so later runs can send conditional GETs and a
+# 304 costs a few hundred bytes instead of a full page download.
+
+DEFAULT_CACHE_DIR = "UIC/data/http_cache"
+
+
+@dataclass
+class CachedResponse:
+    status: int          # HTTP status of the page (200 after a 304 revalidation)
+    text: str | None     # page body, None when the page could not be fetched
+    changed: bool        # False when the body is known to match the previous run
+
+
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+class ResponseCache:
+    """Conditional-GET cache keyed by URL. Safe to share between threads."""
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.index_path = os.path.join(cache_dir, "index.json")
+        self._lock = threading.Lock()
+        self._index = {}
+        if os.path.exists(self.index_path):
+            try:
+                with open(self.index_path) as f:
+                    self._index = json.load(f)
+            except (OSError, ValueError):
+                self._index = {}
+
+    def _body_path(self, url):
+        return os.path.join(self.cache_dir, f"{_sha256(url.encode())}.html.gz")
+
+    def _read_body(self, url):
+        try:
+            with gzip.open(self._body_path(url), "rb") as f:
+                return f.read().decode("utf-8")
+        except OSError:
+            return None
+
+    def _write_body(self, url, body: bytes):
+        path = self._body_path(url)
+        tmp_path = f"{path}.tmp.{threading.get_ident()}"
+        with gzip.open(tmp_path, "wb", compresslevel=6) as f:
+            f.write(body)
+        os.replace(tmp_path, path)
+
+    def fetch(self, url):
+        """GET `url`, revalidating against the cached copy when there is one.
+
+        Network errors propagate (requests.RequestException), like http_client.get.
+        """
+        with self._lock:
+            entry = dict(self._index.get(url, {}))
+
+        headers = {}
+        cached_text = None
+        if entry.get("status") == 200:
+            cached_text = self._read_body(url)
+            if cached_text is not None:
+                if entry.get("etag"):
+                    headers["If-None-Match"] = entry["etag"]
+                if entry.get("last_modified"):
+                    headers["If-Modified-Since"] = entry["last_modified"]
+
+        response = http_client.get(url, headers=headers)
+
+        if response.status_code == 304 and cached_text is not None:
+            return CachedResponse(200, cached_text, changed=False)
+
+        if response.status_code != 200:
+            # Remember misses too, so a term that was never published is not "new" every run
+            changed = entry.get("status") != response.status_code
+            with self._lock:
+                self._index[url] = {"status": response.status_code}
+            return CachedResponse(response.status_code, None, changed)
+
+        text = response.text
+        body = text.encode("utf-8")
+        digest = _sha256(body)
+        changed = digest != entry.get("sha256")
+        if changed or cached_text is None:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self._write_body(url, body)
+
+        with self._lock:
+            self._index[url] = {
+                "status": 200,
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "sha256": digest,
+            }
+        return CachedResponse(200, text, changed)
+
+    def peek(self, url):
+        """Return the cached copy of `url` without touching the network, or None.
+
+        A remembered miss (e.g. 404) comes back as a response with text None.
+        """
+        with self._lock:
+            entry = self._index.get(url)
+        if not entry:
+            return None
+        if entry.get("status") != 200:
+            return CachedResponse(entry["status"], None, changed=True)
+        text = self._read_body(url)
+        return None if text is None else CachedResponse(200, text, changed=True)
+
+    def save(self):
+        """Persist the validator index (atomically)."""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        with self._lock:
+            snapshot = dict(self._index)
+        tmp_path = f"{self.index_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(snapshot, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.index_path)
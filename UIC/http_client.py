@@ -0,0 +1,316 @@
+import random
+import socket
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+# Shared HTTP client for the scrapers.
+# One pooled requests.Session keeps connections (and TLS sessions) alive per
+# host; transient failures are retried with jittered exponential backoff.
+# Every request also passes through a per-host adaptive limiter (token
+# bucket + AIMD concurrency window) so we stay polite to the UIC/UIS servers
+# without hand-tuning a fixed rate.
+
+# Request headers to avoid being blocked
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Responses that mean "slow down" to the limiter (timeouts count too)
+BACKOFF_STATUSES = {429, 502, 503, 504}
+
+_config = {
+    "timeout": 10,         # seconds per attempt
+    "retries": 3,          # extra attempts after the first one
+    "backoff": 0.5,        # base delay in seconds, doubled per attempt
+    "max_backoff": 8.0,    # cap on a single delay
+    "pool_maxsize": 16,    # keep-alive connections per host
+    "headers": dict(DEFAULT_HEADERS),
+    # Adaptive limiter (per host)
+    "max_per_host": 16,    # ceiling for the concurrency window
+    "start_per_host": 4,   # initial concurrency window
+    "rate": 5.0,           # initial requests/second
+    "min_rate": 0.5,
+    "max_rate": 50.0,
+    "latency_factor": 2.0, # latency above factor × baseline counts as congestion
+}
+
+_session = None
+_session_lock = threading.Lock()
+
+# Optional per-attempt timing callback (see set_observer)
+_observer = None
+# DNS/connect time of the connection opened by the current thread's request
+_timing = threading.local()
+
+
+# ===================== Connection timing =====================
+
+class _TimedConnectionMixin:
+    """Records DNS and connect time when a request has to open a new connection.
+
+    Reused keep-alive connections never get here, so their DNS/connect time
+    stays 0. DNS is timed with a separate lookup just before connecting,
+    and only while an observer is set.
+    """
+
+    def _new_conn(self):
+        if _observer is not None:
+            start = time.perf_counter()
+            try:
+                socket.getaddrinfo(self._dns_host, self.port, 0, socket.SOCK_STREAM)
+            except OSError:
+                pass  # the real connect below reports the error
+            _timing.dns = time.perf_counter() - start
+        return super()._new_conn()
+
+    def connect(self):
+        start = time.perf_counter()
+        super().connect()
+        # TCP (+ TLS handshake for https), without the DNS lookup above
+        _timing.connect = time.perf_counter() - start - getattr(_timing, "dns", 0.0)
+
+
+class _TimedHTTPConnection(_TimedConnectionMixin, HTTPConnection):
+    pass
+
+
+class _TimedHTTPSConnection(_TimedConnectionMixin, HTTPSConnection):
+    pass
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+class _TimedAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _TimedHTTPConnectionPool,
+            "https": _TimedHTTPSConnectionPool,
+        }
+
+
+class _HostWindow:
+    """Limiter state for one host."""
+
+    def __init__(self, config):
+        self.rate = config["rate"]
+        self.tokens = 1.0
+        self.refilled = time.monotonic()
+        self.limit = float(max(1, min(config["start_per_host"], config["max_per_host"])))
+        self.in_flight = 0
+        self.latency = None        # EWMA of healthy response latency (seconds)
+        self.last_decrease = 0.0
+        self.cond = threading.Condition()
+
+
+class AdaptiveLimiter:
+    """Token bucket + AIMD concurrency control, one window per host.
+
+    Healthy responses grow the concurrency window and the request rate
+    additively (+1/window, +1/rate per response). A 429/502/503/504, a
+    timeout, or latency above `latency_factor` × the baseline halves both,
+    at most once per round-trip. The baseline is an EWMA of response latency
+    that follows slow responses too, only more slowly.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self._lock = threading.Lock()
+        self._windows = {}
+
+    def _window(self, host):
+        with self._lock:
+            if host not in self._windows:
+                self._windows[host] = _HostWindow(self.config)
+            return self._windows[host]
+
+    def _refill(self, w):
+        now = time.monotonic()
+        w.tokens = min(max(1.0, w.rate), w.tokens + (now - w.refilled) * w.rate)
+        w.refilled = now
+
+    def acquire(self, host):
+        w = self._window(host)
+        with w.cond:
+            while True:
+                self._refill(w)
+                if w.in_flight < int(w.limit) and w.tokens >= 1.0:
+                    w.tokens -= 1.0
+                    w.in_flight += 1
+                    return
+                if w.in_flight >= int(w.limit):
+                    w.cond.wait(timeout=1.0)  # woken by release()
+                else:
+                    w.cond.wait(timeout=(1.0 - w.tokens) / w.rate)
+
+    def release(self, host, status, latency):
+        """Feed back one finished request; status None means timeout/connection error."""
+        cfg = self.config
+        w = self._window(host)
+        with w.cond:
+            w.in_flight -= 1
+            now = time.monotonic()
+            congested = status is None or status in BACKOFF_STATUSES
+            slow = not congested and w.latency is not None and latency > cfg["latency_factor"] * w.latency
+
+            if congested or slow:
+                # Multiplicative decrease, once per round-trip
+                if now - w.last_decrease > (w.latency or 1.0):
+                    w.limit = max(1.0, w.limit / 2)
+                    w.rate = max(cfg["min_rate"], w.rate / 2)
+                    w.last_decrease = now
+                if slow:
+                    # Let the baseline drift towards slow responses, so a lasting
+                    # latency increase (bigger pages, slower server) becomes the
+                    # new normal instead of throttling to min_rate for good
+                    w.latency = 0.95 * w.latency + 0.05 * latency
+            else:
+                w.limit = min(float(cfg["max_per_host"]), w.limit + 1.0 / w.limit)
+                w.rate = min(cfg["max_rate"], w.rate + 1.0 / w.rate)
+                w.latency = latency if w.latency is None else 0.9 * w.latency + 0.1 * latency
+            w.cond.notify_all()
+
+    def stats(self):
+        """Current rate/window per host, e.g. for logging or a run report."""
+        with self._lock:
+            windows = dict(self._windows)
+        return {
+            host: {
+                "rate_per_s": round(w.rate, 2),
+                "concurrency": int(w.limit),
+                "in_flight": w.in_flight,
+                "latency_ms": None if w.latency is None else round(w.latency * 1000, 1),
+            }
+            for host, w in windows.items()
+        }
+
+
+_limiter = AdaptiveLimiter(_config)
+
+
+def configure(**options):
+    """Set client options once, before the first request.
+
+    Accepts any key of the default config (timeout, retries, backoff,
+    max_backoff, pool_maxsize, headers, and the limiter settings).
+    Resets the shared session and limiter.
+    """
+    global _session, _limiter
+    unknown = set(options) - set(_config)
+    if unknown:
+        raise ValueError(f"Unknown http_client option(s): {', '.join(sorted(unknown))}")
+    with _session_lock:
+        _config.update(options)
+        if _session is not None:
+            _session.close()
+            _session = None
+        _limiter = AdaptiveLimiter(_config)
+
+
+def get_session():
+    """Return the process-wide pooled session, creating it on first use."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = _TimedAdapter(pool_connections=8, pool_maxsize=_config["pool_maxsize"])
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers.update(_config["headers"])
+            _session = session
+        return _session
+
+
+def set_observer(callback):
+    """Call `callback(sample)` after every request attempt (None to stop).
+
+    `sample` is a dict with url, status (None on timeout/connection error),
+    attempt, bytes, and dns_ms/connect_ms/ttfb_ms/total_ms. TTFB is the time
+    until the response headers arrived, including any connection setup.
+    The callback runs on the requesting thread.
+    """
+    global _observer
+    _observer = callback
+
+
+def _observe(url, attempt, start, response):
+    total = time.perf_counter() - start
+    _observer({
+        "url": url,
+        "status": None if response is None else response.status_code,
+        "attempt": attempt,
+        "bytes": 0 if response is None else len(response.content),
+        "dns_ms": round(getattr(_timing, "dns", 0.0) * 1000, 2),
+        "connect_ms": round(getattr(_timing, "connect", 0.0) * 1000, 2),
+        "ttfb_ms": None if response is None else round(response.elapsed.total_seconds() * 1000, 2),
+        "total_ms": round(total * 1000, 2),
+    })
+
+
+def rate_metrics():
+    """Snapshot of the adaptive limiter: {host: {rate_per_s, concurrency, in_flight, latency_ms}}."""
+    return _limiter.stats()
+
+
+def _backoff_delay(attempt, response=None):
+    """Full-jitter exponential backoff: uniform in [0, min(cap, base * 2^attempt)].
+
+    A numeric Retry-After header (429/503) is honoured as a lower bound.
+    """
+    delay = random.uniform(0, min(_config["max_backoff"], _config["backoff"] * (2 ** attempt)))
+    if response is not None:
+        retry_after = response.headers.get("Retry-After", "")
+        if retry_after.isdigit():
+            delay = max(delay, min(float(retry_after), _config["max_backoff"]))
+    return delay
+
+
+def get(url, timeout=None, **kwargs):
+    """GET `url` through the shared session, retrying 429/5xx responses and timeouts.
+
+    Returns the last response (callers still call raise_for_status()).
+    Connection errors and timeouts are re-raised once retries run out.
+    """
+    session = get_session()
+    limiter = _limiter
+    host = urlsplit(url).netloc
+    timeout = _config["timeout"] if timeout is None else timeout
+    retries = _config["retries"]
+
+    for attempt in range(retries + 1):
+        response = None
+        limiter.acquire(host)
+        _timing.dns = _timing.connect = 0.0
+        start = time.perf_counter()
+        try:
+            response = session.get(url, timeout=timeout, **kwargs)
+        except (requests.Timeout, requests.ConnectionError):
+            if _observer is not None:
+                _observe(url, attempt, start, None)
+            if attempt == retries:
+                raise
+        finally:
+            # Exactly one release per acquire, whatever session.get raised
+            # (status None: no response, counted like a timeout)
+            limiter.release(host, None if response is None else response.status_code,
+                            time.perf_counter() - start)
+        if response is not None:
+            if _observer is not None:
+                _observe(url, attempt, start, response)
+            if response.status_code not in RETRY_STATUSES or attempt == retries:
+                return response
+            response.close()
+        time.sleep(_backoff_delay(attempt, response))
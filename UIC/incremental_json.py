@@ -0,0 +1,322 @@
+import gzip
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from combined_index import value_span, write_index
+
+try:
+    import orjson
+except ImportError:  # optional fast serializer for compact output
+    orjson = None
+
+# Incremental, streaming writes for subject-keyed JSON documents
+# (combined.json, uis.json).
+#
+# The document is written one fragment per subject as soon as that subject is
+# assembled, so only one subject is ever held in memory. Pretty output is
+# byte-identical to json.dump(combined, f, indent=2); compact output matches
+# json.dump with no indent (serialized by orjson when installed). Paths ending
+# in .gz are gzip-compressed.
+#
+# A manifest next to the document records, per subject, the SHA-256 of its
+# four input TSVs, its display name, and where its fragment sits in the
+# (uncompressed) document. On the next build only subjects whose inputs (or
+# name) changed are rebuilt; every other fragment is copied from the previous
+# file as raw bytes.
+#
+# Uncompressed documents also get a <name>.index.json of per-subject byte
+# ranges for random access (see combined_index.py).
+#
+# build_combined() is the whole build loop (stale check, parallel assembly,
+# streaming write, shards) shared by build_combined_json.py and the UIS
+# builders; they only supply how one subject's courses are assembled.
+
+SUBJECT_FILE_PREFIXES = ("mastercourselist", "prerequisites", "courseoffering", "coursetiming")
+
+# Bump when the builders change what they emit, so old manifests are ignored
+FORMAT_VERSION = 1
+
+_CHUNK = 1 << 20
+
+
+def subject_input_paths(base_dir, subject):
+    return [os.path.join(base_dir, subject, f"{prefix}_{subject}.txt") for prefix in SUBJECT_FILE_PREFIXES]
+
+
+def file_sha256(path):
+    """SHA-256 of a file (None if it does not exist)."""
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def serializer_name(compact=False):
+    return "orjson" if compact and orjson is not None else "json"
+
+
+def encode_value(value, compact=False):
+    """`value` exactly as json.dump writes it (indent=2, or compact)."""
+    if not compact:
+        return json.dumps(value, indent=2).encode("ascii")
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, separators=(",", ":")).encode("ascii")
+
+
+def encode_fragment(subject, value, compact=False):
+    """One top-level entry of the document, indented to sit inside it."""
+    key = json.dumps(subject).encode("ascii")
+    if compact:
+        return key + b":" + encode_value(value, compact=True)
+    return b"  " + key + b": " + encode_value(value).replace(b"\n", b"\n  ")
+
+
+def _open_document(path, mode, gzipped=None):
+    if gzipped is None:
+        gzipped = path.endswith(".gz")
+    return gzip.open(path, mode) if gzipped else open(path, mode)
+
+
+class DocumentWriter:
+    """Streams fragments into a new document at `path` (temp file + rename on close).
+
+    add() returns each fragment's (offset, length) in the uncompressed
+    document; close() returns its total size and SHA-256.
+    """
+
+    def __init__(self, path, compact=False):
+        self.path = path
+        self.tmp_path = f"{path}.tmp"
+        self.compact = compact
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = _open_document(self.tmp_path, "wb", gzipped=path.endswith(".gz"))
+        self._sha = hashlib.sha256()
+        self._size = 0
+        self._count = 0
+
+    def _write(self, data):
+        self._file.write(data)
+        self._sha.update(data)
+        self._size += len(data)
+
+    def add(self, fragment):
+        if self._count == 0:
+            self._write(b"{" if self.compact else b"{\n")
+        else:
+            self._write(b"," if self.compact else b",\n")
+        self._count += 1
+        offset = self._size
+        self._write(fragment)
+        return offset, len(fragment)
+
+    def close(self):
+        if self._count == 0:
+            self._write(b"{}")
+        else:
+            self._write(b"}" if self.compact else b"\n}")
+        self._file.close()
+        os.replace(self.tmp_path, self.path)
+        return self._size, self._sha.hexdigest()
+
+    def abort(self):
+        self._file.close()
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+
+class BuildManifest:
+    """Per-subject input hashes and fragment offsets for one output document.
+
+    `context` holds inputs shared by every subject (e.g. the credit cache
+    hash); if it differs from the previous build, everything is rebuilt.
+    The output path and format are part of the context too.
+    """
+
+    def __init__(self, path, output_path, context=None, compact=False):
+        self.path = path
+        self.output_path = output_path
+        self.compact = compact
+        self.context = dict(context or {}, format=FORMAT_VERSION, output=output_path,
+                            compact=compact, serializer=serializer_name(compact))
+        self.subjects = {}
+        self._spans = []
+        self._previous = {}
+        self._document = None
+
+        if not (os.path.exists(path) and os.path.exists(output_path)):
+            return
+        with open(path) as f:
+            previous = json.load(f)
+        if previous.get("context") != self.context:
+            print("ℹ️ Build inputs or output format changed since the last run; rebuilding every subject")
+            return
+        output = previous.get("output", {})
+        size, sha = 0, hashlib.sha256()
+        with _open_document(output_path, "rb") as f:
+            for chunk in iter(lambda: f.read(_CHUNK), b""):
+                size += len(chunk)
+                sha.update(chunk)
+        if size != output.get("size") or sha.hexdigest() != output.get("sha256"):
+            print(f"ℹ️ {output_path} was modified outside the builder; rebuilding every subject")
+            return
+        self._previous = previous.get("subjects", {})
+        # Fragments are read back in document order while the new file is written
+        self._document = _open_document(output_path, "rb")
+
+    def input_digest(self, base_dir, subject):
+        """Combined hash of the subject's four TSVs, or None if one is missing.
+
+        Files whose size and mtime match the previous build are not re-read.
+        """
+        paths = subject_input_paths(base_dir, subject)
+        try:
+            stats = [[st.st_size, st.st_mtime_ns] for st in map(os.stat, paths)]
+        except FileNotFoundError:
+            return None
+        previous = self._previous.get(subject, {})
+        if previous.get("stats") == stats:
+            digest = previous["sha256"]
+        else:
+            h = hashlib.sha256()
+            for p in paths:
+                h.update(file_sha256(p).encode())
+            digest = h.hexdigest()
+        self.subjects[subject] = {"sha256": digest, "stats": stats}
+        return digest
+
+    def is_current(self, subject, digest, name=None):
+        """True if the previous document already holds this subject's fragment."""
+        previous = self._previous.get(subject)
+        return (
+            self._document is not None
+            and previous is not None
+            and previous.get("sha256") == digest
+            and previous.get("name") == name
+        )
+
+    def previous_fragment(self, subject):
+        entry = self._previous[subject]
+        self._document.seek(entry["offset"])
+        return self._document.read(entry["length"])
+
+    def open_writer(self):
+        return DocumentWriter(self.output_path, self.compact)
+
+    def add(self, writer, subject, fragment, name=None):
+        """Stream one subject's fragment into `writer` and record where it went.
+
+        Subjects added without input_digest() have no hash and are rebuilt next time.
+        """
+        offset, length = writer.add(fragment)
+        self.subjects.setdefault(subject, {}).update(name=name, offset=offset, length=length)
+        self._spans.append((subject, *value_span(fragment, offset)))
+
+    def finish(self, writer):
+        """Close the document, then write the manifest (temp file + rename)."""
+        if self._document is not None:
+            self._document.close()
+        size, sha = writer.close()
+        # Byte offsets only make sense for an uncompressed document
+        if not self.output_path.endswith(".gz"):
+            write_index(self.output_path, size, sha, self._spans)
+        written = {s for s, e in self.subjects.items() if "offset" in e}
+        manifest = {
+            "context": self.context,
+            "output": {"size": size, "sha256": sha},
+            "subjects": {s: e for s, e in sorted(self.subjects.items()) if s in written},
+        }
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, self.path)
+        return size
+
+
+def map_subjects(build_subject, base_dir, subjects, workers=1):
+    """Yield build_subject(subject, subject_path) for every subject, in `subjects` order.
+
+    With workers > 1 the subjects are built in a process pool (build_subject
+    must be picklable); results are still yielded in input order, so the
+    JSON is identical to a serial run.
+    """
+    paths = [os.path.join(base_dir, subject) for subject in subjects]
+    if workers <= 1:
+        yield from map(build_subject, subjects, paths)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        chunksize = max(1, len(subjects) // (workers * 4))
+        yield from pool.map(build_subject, subjects, paths, chunksize=chunksize)
+
+
+def build_combined(base_dir, subjects, build_subject, output_path, manifest_path, names=None, context=None,
+                   full=False, compact=False, shard_dir=None, workers=1):
+    """Build the document at `output_path` from `subjects` (directories in `base_dir`).
+
+    `build_subject(subject, subject_path)` returns a subject's course array,
+    or None when one of its files is missing. `names` maps subject → display
+    name, stored as the entry's "subject" (None: entries have no name). Only
+    subjects whose TSVs or name changed since the last build are assembled
+    (all of them with full=True); the rest are copied from the previous
+    document as recorded in the manifest. Returns (subjects written, subjects rebuilt).
+    """
+    from json_shards import ShardWriter  # json_shards imports this module
+
+    name_of = (names or {}).get
+
+    manifest = BuildManifest(manifest_path, output_path, context=context, compact=compact)
+    shards = ShardWriter(shard_dir, context=context, compact=compact) if shard_dir else None
+    digests = {subject: manifest.input_digest(base_dir, subject) for subject in subjects}
+    stale = [
+        subject for subject in subjects
+        if digests[subject] is not None
+        and (full
+             or not manifest.is_current(subject, digests[subject], name_of(subject))
+             or (shards is not None and not shards.is_current(subject, digests[subject], name_of(subject))))
+    ]
+
+    # Subjects are assembled lazily and streamed out one at a time
+    workers = workers if workers > 0 else os.cpu_count()
+    rebuilt = map_subjects(build_subject, base_dir, stale, workers)
+
+    writer = manifest.open_writer()
+    written = built = 0
+    try:
+        for subject in subjects:
+            course_array = next(rebuilt) if subject in stale else None
+            if digests[subject] is None or (subject in stale and course_array is None):
+                print(f"⚠️ Skipping {subject}: missing one or more files")
+                continue
+            written += 1
+            subject_name = name_of(subject)
+            if subject not in stale:
+                manifest.add(writer, subject, manifest.previous_fragment(subject), subject_name)
+                if shards is not None:
+                    shards.keep(subject)
+                continue
+
+            if names is None:
+                subject_value = {"courses": course_array}
+                print(f"✅ Processed {subject} → {len(course_array)} courses")
+            else:
+                subject_value = {"subject": subject_name, "courses": course_array}
+                print(f"✅ Processed {subject} ({subject_name}) → {len(course_array)} courses")
+            manifest.add(writer, subject, encode_fragment(subject, subject_value, compact), subject_name)
+            if shards is not None:
+                shards.write(subject, subject_value, digests[subject], subject_name)
+            built += 1
+    except BaseException:
+        writer.abort()
+        raise
+    size = manifest.finish(writer)
+    if shards is not None:
+        shard_bytes = shards.finish()
+        print(f"🧩 {len(shards.subjects)} subject shards in {shard_dir} ({shard_bytes / 1e6:.1f} MB)")
+
+    print(f"\n🎉 {os.path.basename(output_path)} saved with {written} subjects at {output_path} "
+          f"({built} rebuilt, {written - built} unchanged, {size / 1e6:.1f} MB)")
+    return written, built
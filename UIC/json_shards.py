@@ -0,0 +1,140 @@
+import hashlib
+import json
+import os
+
+from incremental_json import encode_value
+
+try:
+    import orjson
+except ImportError:  # optional fast parser
+    orjson = None
+
+# One JSON file per subject, next to combined.json / uis.json.
+#
+#   <dir>/CS.json         {"subject": "computer science", "courses": [...]}
+#   <dir>/manifest.json   {"subjects": {"CS": {"file", "name", "courses", "bytes", "sha256"}}}
+#
+# Each shard holds exactly what combined.json has under that subject's key, so
+# a consumer that only needs CS and MATH reads two small files instead of the
+# whole document:
+#
+#   from json_shards import load_shards
+#   catalog = load_shards("UIC/data/shards", ["CS", "MATH"])
+#
+# The builders write shards with --shards; unchanged subjects keep their
+# existing file.
+
+DEFAULT_SHARD_DIR = "UIC/data/shards"
+MANIFEST_NAME = "manifest.json"
+
+# Bump when the shard layout changes, so old manifests are ignored
+FORMAT_VERSION = 1
+
+
+def _loads(data):
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+def _write_atomic(path, data):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+class ShardWriter:
+    """Writes per-subject shards into `directory` plus their manifest.
+
+    `context` holds build inputs shared by every subject (credit cache hash,
+    output format); if it differs from the previous run, every shard is
+    rewritten.
+    """
+
+    def __init__(self, directory, context=None, compact=False):
+        self.directory = directory
+        self.compact = compact
+        self.context = dict(context or {}, format=FORMAT_VERSION, compact=compact)
+        self.subjects = {}
+        self._previous = {}
+
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, MANIFEST_NAME)
+        if os.path.exists(path):
+            with open(path) as f:
+                previous = json.load(f)
+            if previous.get("context") == self.context:
+                self._previous = previous.get("subjects", {})
+
+    def _path(self, subject):
+        return os.path.join(self.directory, f"{subject}.json")
+
+    def is_current(self, subject, digest, name=None):
+        """True if the subject's shard was written from the same inputs and is untouched."""
+        previous = self._previous.get(subject)
+        if previous is None or previous.get("input") != digest or previous.get("name") != name:
+            return False
+        try:
+            with open(self._path(subject), "rb") as f:
+                return hashlib.sha256(f.read()).hexdigest() == previous["sha256"]
+        except OSError:
+            return False
+
+    def keep(self, subject):
+        """Carry an unchanged shard over to the new manifest."""
+        self.subjects[subject] = self._previous[subject]
+
+    def write(self, subject, value, digest, name=None):
+        data = encode_value(value, self.compact)
+        _write_atomic(self._path(subject), data)
+        self.subjects[subject] = {
+            "file": f"{subject}.json",
+            "name": name,
+            "courses": len(value["courses"]),
+            "bytes": len(data),
+            "sha256": hashlib.sha256(data).hexdigest(),
+            "input": digest,
+        }
+
+    def finish(self):
+        """Remove shards of subjects that are gone, then write the manifest."""
+        for subject in set(self._previous) - set(self.subjects):
+            path = self._path(subject)
+            if os.path.exists(path):
+                os.remove(path)
+        manifest = {
+            "context": self.context,
+            "subjects": dict(sorted(self.subjects.items())),
+        }
+        _write_atomic(os.path.join(self.directory, MANIFEST_NAME),
+                      json.dumps(manifest, indent=2).encode("ascii"))
+        return sum(entry["bytes"] for entry in self.subjects.values())
+
+
+# ===================== Loader =====================
+
+def read_shard_manifest(directory=DEFAULT_SHARD_DIR):
+    """subject → {"file", "name", "courses", "bytes", "sha256", ...}."""
+    with open(os.path.join(directory, MANIFEST_NAME)) as f:
+        return json.load(f)["subjects"]
+
+
+def load_shards(directory=DEFAULT_SHARD_DIR, subjects=None, verify=False):
+    """{subject: {"subject": name, "courses": [...]}} for the requested subjects.
+
+    Only the requested shard files are opened (all of them when `subjects`
+    is None). Raises KeyError for a subject not in the manifest, and
+    ValueError if verify=True and a shard's hash does not match.
+    """
+    manifest = read_shard_manifest(directory)
+    if subjects is None:
+        subjects = list(manifest)
+
+    loaded = {}
+    for subject in subjects:
+        entry = manifest[subject]
+        with open(os.path.join(directory, entry["file"]), "rb") as f:
+            data = f.read()
+        if verify and hashlib.sha256(data).hexdigest() != entry["sha256"]:
+            raise ValueError(f"Shard {entry['file']} does not match its manifest hash")
+        loaded[subject] = _loads(data)
+    return loaded
@@ -0,0 +1,181 @@
+from collections import defaultdict
+
+from combined_index import course_subject
+from duckdb_batch import ColumnBatch
+
+# Transitive prerequisite closure of a DuckDB catalog, materialized at build
+# time so "everything CS___401 needs" and "everything MATH_180 leads to" are
+# single indexed lookups instead of recursive walks:
+#
+#   prereq_closure(course_id, ancestor_id, depth, min_type)
+#       every course reachable from course_id through prerequisites
+#   prereq_descendants(course_id, descendant_id, depth, min_type)
+#       the reverse: every course that (transitively) requires course_id
+#   prereq_cycles(cycle_id, course_id)
+#       courses that end up requiring themselves
+#
+# depth is the length of the shortest prerequisite chain between the two
+# courses (1 = direct prerequisite); min_type is the smallest `type` on any
+# chain between them (-1 as soon as one chain has a -1 edge).
+#
+# The prerequisite graph is split into strongly connected components
+# (Tarjan), which come out prerequisites-first, so each course's closure is
+# built once from the already finished closures of its prerequisites. Only
+# courses inside a cycle need more than one pass; cycles are reported and
+# recorded in prereq_cycles, and a course never lists itself as an ancestor.
+# Built by every DuckDB builder (duckdb_layout.finish_catalog).
+#
+# After an incremental update only the rows of courses whose closure can
+# involve an updated subject are rewritten: its own courses, and every course
+# that had or now has one of them as an ancestor. Computing the closure is
+# cheap (tens of ms); writing and sorting all of it is not.
+
+
+def strongly_connected_components(graph):
+    """Tarjan's algorithm (iterative). `graph` is {node: [(neighbour, _), ...]}.
+
+    Yields each component as a list, after every component it has edges into.
+    """
+    index, low = {}, {}
+    stack, on_stack = [], set()
+
+    def visit(node):
+        index[node] = low[node] = len(index)
+        stack.append(node)
+        on_stack.add(node)
+        return node, iter(graph.get(node, ()))
+
+    for root in graph:
+        if root in index:
+            continue
+        work = [visit(root)]
+        while work:
+            node, edges = work[-1]
+            for neighbour, _ in edges:
+                if neighbour not in index:
+                    work.append(visit(neighbour))
+                    break
+                if neighbour in on_stack:
+                    low[node] = min(low[node], index[neighbour])
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[node])
+                if low[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    yield component
+
+
+def compute_closure(edges):
+    """Closure of (course_id, prereq_id, type) edges.
+
+    Returns (closure, cycles): closure is {course_id: {ancestor_id: (depth, min_type)}}
+    and cycles is a list of sorted course lists.
+    """
+    graph = defaultdict(list)
+    for course_id, prereq_id, ptype in edges:
+        graph[course_id].append((prereq_id, ptype))
+        graph.setdefault(prereq_id, [])
+
+    closure, cycles = {}, []
+    for component in strongly_connected_components(graph):
+        cyclic = len(component) > 1 or any(prereq == component[0] for prereq, _ in graph[component[0]])
+        if cyclic:
+            cycles.append(sorted(component))
+        for node in component:
+            closure[node] = {}
+
+        changed = True
+        while changed:  # one pass outside cycles; inside one, until nothing improves
+            changed = False
+            for node in component:
+                ancestors = closure[node]
+                for prereq, ptype in graph[node]:
+                    reachable = [(prereq, 0, ptype)] + [(a, d, min(t, ptype)) for a, (d, t) in closure[prereq].items()]
+                    for ancestor, depth, min_type in reachable:
+                        old = ancestors.get(ancestor)
+                        new = (depth + 1, min_type) if old is None else (min(old[0], depth + 1), min(old[1], min_type))
+                        if new != old:
+                            ancestors[ancestor] = new
+                            changed = True
+            changed = changed and cyclic
+
+    cycles.sort()
+    for course_id, ancestors in closure.items():
+        ancestors.pop(course_id, None)
+    return closure, cycles
+
+
+def _course_subject_sql(column):
+    # combined_index.course_subject in SQL
+    return f"rtrim(rtrim({column}, '0123456789'), '_')"
+
+
+def build_prereq_closure(con, subjects=None):
+    """(Re)create prereq_closure, prereq_descendants and prereq_cycles from `prerequisites`.
+
+    With `subjects` (updated by an incremental load), only the affected
+    courses' rows are replaced; None rebuilds the tables. Returns {table: rows written}.
+    """
+    edges = con.execute("SELECT course_id, prereq_id, type FROM prerequisites").fetchall()
+    closure, cycles = compute_closure(edges)
+
+    tables = {table for (table,) in con.execute("SELECT table_name FROM information_schema.tables").fetchall()}
+    if subjects is None or not {"prereq_closure", "prereq_descendants"} <= tables:
+        con.execute("""
+        CREATE OR REPLACE TABLE prereq_closure (
+          course_id TEXT,
+          ancestor_id TEXT,
+          depth INT,
+          min_type INT
+        )""")
+        con.execute("""
+        CREATE OR REPLACE TABLE prereq_descendants (
+          course_id TEXT,
+          descendant_id TEXT,
+          depth INT,
+          min_type INT
+        )""")
+        affected = closure.keys()
+    else:
+        stale = set(subjects)
+        affected = {
+            course_id for course_id, ancestors in closure.items()
+            if course_subject(course_id) in stale or any(course_subject(a) in stale for a in ancestors)
+        }
+        affected.update(course_id for (course_id,) in con.execute(f"""
+            SELECT DISTINCT course_id FROM prereq_closure
+            WHERE {_course_subject_sql("course_id")} = ANY($stale) OR {_course_subject_sql("ancestor_id")} = ANY($stale)
+        """, {"stale": sorted(stale)}).fetchall())
+        con.execute("DELETE FROM prereq_closure WHERE course_id = ANY($1)", [sorted(affected)])
+        con.execute("DELETE FROM prereq_descendants WHERE descendant_id = ANY($1)", [sorted(affected)])
+    con.execute("""
+    CREATE OR REPLACE TABLE prereq_cycles (
+      cycle_id INT,
+      course_id TEXT
+    )""")
+
+    # Sorted and indexed by duckdb_layout.optimize_layout
+    batch = ColumnBatch(con, tables={"prereq_closure", "prereq_descendants", "prereq_cycles"})
+    for course_id in affected:  # removed courses only lose their rows
+        for ancestor_id, (depth, min_type) in closure.get(course_id, {}).items():
+            batch.add("prereq_closure", course_id, ancestor_id, depth, min_type)
+            batch.add("prereq_descendants", ancestor_id, course_id, depth, min_type)
+
+    if cycles:
+        shown = "; ".join(" ↔ ".join(cycle) for cycle in cycles[:5])
+        more = f"; … {len(cycles) - 5} more" if len(cycles) > 5 else ""
+        print(f"⚠️ {len(cycles)} prerequisite cycles (see prereq_cycles): {shown}{more}")
+    for cycle_id, cycle in enumerate(cycles):
+        for course_id in cycle:
+            batch.add("prereq_cycles", cycle_id, course_id)
+
+    inserted = batch.flush(con)
+    return {table: inserted.get(table, 0) for table in ("prereq_closure", "prereq_descendants", "prereq_cycles")}
@@ -0,0 +1,85 @@
+import json
+import os
+import threading
+from datetime import datetime
+
+# Checkpoint file for scrape_subject_links.py runs.
+#
+# Records each (subject, term-year) page as "fetched" then "parsed", and
+# each subject as "written" once its output files are in place, so an
+# interrupted run can pick up where it stopped with --resume.
+
+DEFAULT_MANIFEST_PATH = "UIC/data/scrape_run.json"
+
+FETCHED = "fetched"
+PARSED = "parsed"
+WRITTEN = "written"
+
+
+class RunManifest:
+    def __init__(self, path=DEFAULT_MANIFEST_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self.data = {"started": None, "complete": False, "terms": [], "subjects": {}}
+
+    def start(self, terms, resume=False):
+        """Begin a run over `terms`. With resume=True, keep the previous run's
+        progress if it covered the same terms; otherwise start from scratch."""
+        terms = [[term, year] for term, year in terms]
+        if resume and os.path.exists(self.path):
+            with open(self.path) as f:
+                previous = json.load(f)
+            if previous.get("terms") == terms:
+                self.data = previous
+                return True
+            print("[WARN] Previous run covered different terms; starting a fresh run")
+        self.data = {
+            "started": datetime.now().isoformat(timespec="seconds"),
+            "complete": False,
+            "terms": terms,
+            "subjects": {},
+        }
+        self.save()
+        return False
+
+    def _subject(self, subject):
+        return self.data["subjects"].setdefault(subject, {"status": None, "pages": {}})
+
+    def page_status(self, subject, term_key):
+        with self._lock:
+            return self.data["subjects"].get(subject, {}).get("pages", {}).get(term_key)
+
+    def is_written(self, subject):
+        with self._lock:
+            return self.data["subjects"].get(subject, {}).get("status") == WRITTEN
+
+    def mark_fetched(self, subject, term_keys):
+        with self._lock:
+            pages = self._subject(subject)["pages"]
+            for term_key in term_keys:
+                pages[term_key] = FETCHED
+        self.save()
+
+    def mark_written(self, subject):
+        with self._lock:
+            entry = self._subject(subject)
+            for term_key in entry["pages"]:
+                entry["pages"][term_key] = PARSED
+            entry["status"] = WRITTEN
+        self.save()
+
+    def mark_complete(self):
+        with self._lock:
+            self.data["complete"] = True
+        self.save()
+
+    def save(self):
+        """Write the manifest atomically (temp file + rename)."""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(self.data, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.path)
@@ -0,0 +1,117 @@
+from dataclasses import dataclass
+
+from bs4 import BeautifulSoup
+
+try:
+    import lxml.etree
+    import lxml.html
+except ImportError:  # optional fast path
+    lxml = None
+
+# Pluggable HTML backends for schedule pages.
+#
+# Every backend reduces a page to a list of CourseBlock records holding
+# exactly what parse_course_table reads:
+#   - text: the block's text, same as BeautifulSoup get_text(" ", strip=True)
+#   - rows: one list of <td> texts per <tr>, same as get_text(strip=True)
+# so all backends produce identical scraper output.
+
+BACKENDS = ("auto", "lxml", "bs4")
+
+# Course containers, tried in order; whole-page tables are the last resort
+_BLOCK_CLASSES = ("course", "course-block")
+
+
+@dataclass
+class CourseBlock:
+    text: str
+    rows: list  # list[list[str]]
+
+
+def available_backends():
+    return ["lxml", "bs4"] if lxml is not None else ["bs4"]
+
+
+def resolve_backend(name="auto"):
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown parser backend: {name!r} (choose from {', '.join(BACKENDS)})")
+    if name == "auto":
+        return "lxml" if lxml is not None else "bs4"
+    if name == "lxml" and lxml is None:
+        raise ValueError("Parser backend 'lxml' requested but lxml is not installed")
+    return name
+
+
+# ===================== BeautifulSoup (reference) =====================
+
+def _bs4_blocks(html):
+    soup = BeautifulSoup(html, "html.parser")
+    courses = []
+    for class_name in _BLOCK_CLASSES:
+        courses = soup.find_all("div", class_=class_name)
+        if courses:
+            break
+    if not courses:
+        # Fallback: entire page tables (some pages are just big tables)
+        courses = soup.find_all("table")
+
+    return [
+        CourseBlock(
+            text=course.get_text(" ", strip=True),
+            rows=[
+                [col.get_text(strip=True) for col in row.find_all("td")]
+                for row in course.find_all("tr")
+            ],
+        )
+        for course in courses
+    ]
+
+
+# ===================== lxml (fast path) =====================
+
+def _class_xpath(class_name):
+    return f"//div[contains(concat(' ', normalize-space(@class), ' '), ' {class_name} ')]"
+
+
+def _lxml_text(el, sep):
+    parts = (t.strip() for t in el.xpath(".//text()"))
+    return sep.join(t for t in parts if t)
+
+
+def _lxml_blocks(html):
+    root = lxml.html.fromstring(html)
+    # BeautifulSoup's get_text leaves out script/style/template contents
+    lxml.etree.strip_elements(root, "script", "style", "template", with_tail=False)
+    courses = []
+    for class_name in _BLOCK_CLASSES:
+        courses = root.xpath(_class_xpath(class_name))
+        if courses:
+            break
+    if not courses:
+        courses = root.xpath("//table")
+
+    return [
+        CourseBlock(
+            text=_lxml_text(course, " "),
+            rows=[
+                [_lxml_text(col, "") for col in row.iter("td")]
+                for row in course.iter("tr")
+            ],
+        )
+        for course in courses
+    ]
+
+
+def extract_course_blocks(html, backend="auto"):
+    """Return the CourseBlock list for one schedule page.
+
+    "auto" uses lxml when installed. If the fast path fails on a page, the
+    BeautifulSoup path is used instead.
+    """
+    backend = resolve_backend(backend)
+    if backend == "lxml":
+        try:
+            return _lxml_blocks(html)
+        except Exception as e:
+            print(f"[WARN] lxml parse failed ({e}); falling back to BeautifulSoup")
+    return _bs4_blocks(html)
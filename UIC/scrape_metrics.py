@@ -0,0 +1,142 @@
+import csv
+import json
+import os
+import threading
+from collections import defaultdict
+from datetime import datetime
+
+# Run report for scrape_subject_links.py.
+#
+# Collects one sample per HTTP request attempt (via http_client.set_observer)
+# and one record per scraped subject (parse/write time and counts), then
+# writes them out at the end of a run:
+#   <report>.json           summary with p50/p95/p99 per metric + slowest subjects
+#   <report>_requests.csv   one row per request attempt
+#   <report>_subjects.csv   one row per subject
+
+DEFAULT_REPORT_PATH = "UIC/data/scrape_metrics"
+
+REQUEST_FIELDS = ["url", "subject", "status", "attempt", "bytes",
+                  "dns_ms", "connect_ms", "ttfb_ms", "total_ms"]
+SUBJECT_FIELDS = ["subject", "pages", "fetch_ms", "bytes", "parse_ms", "write_ms",
+                  "courses", "sections", "prereq_links", "written"]
+PERCENTILES = (50, 95, 99)
+
+
+def percentile(values, q):
+    """Nearest-rank percentile of `values` (None when empty)."""
+    values = sorted(v for v in values if v is not None)
+    if not values:
+        return None
+    rank = max(1, -(-q * len(values) // 100))  # ceil(q/100 * n)
+    return values[rank - 1]
+
+
+def distribution(values):
+    values = [v for v in values if v is not None]
+    summary = {f"p{q}": percentile(values, q) for q in PERCENTILES}
+    summary["max"] = max(values) if values else None
+    summary["count"] = len(values)
+    return summary
+
+
+class RunMetrics:
+    """Thread-safe collector for one scrape run.
+
+    `subject_of(url)` maps a request URL to its subject so fetch time and
+    bytes can be attributed per subject.
+    """
+
+    def __init__(self, subject_of=None):
+        self.subject_of = subject_of or (lambda url: None)
+        self.started = datetime.now().isoformat(timespec="seconds")
+        self._lock = threading.Lock()
+        self.requests = []
+        self.subjects = {}
+
+    def record_request(self, sample):
+        """http_client observer callback."""
+        sample = dict(sample, subject=self.subject_of(sample["url"]))
+        with self._lock:
+            self.requests.append(sample)
+
+    def record_subject(self, subject, metrics):
+        """Store scrape_subject's per-subject metrics dict."""
+        with self._lock:
+            self.subjects[subject] = dict(metrics, subject=subject)
+
+    def _subject_rows(self):
+        fetch_ms = defaultdict(float)
+        fetched_bytes = defaultdict(int)
+        pages = defaultdict(int)
+        for sample in self.requests:
+            subject = sample["subject"]
+            fetch_ms[subject] += sample["total_ms"]
+            fetched_bytes[subject] += sample["bytes"]
+            pages[subject] += 1
+        rows = []
+        for subject in sorted(set(self.subjects) | {s for s in pages if s is not None}):
+            row = {field: None for field in SUBJECT_FIELDS}
+            row.update(self.subjects.get(subject, {}))
+            row.update(subject=subject, pages=pages[subject],
+                       fetch_ms=round(fetch_ms[subject], 2), bytes=fetched_bytes[subject])
+            rows.append(row)
+        return rows
+
+    def summary(self, top=10):
+        with self._lock:
+            requests = list(self.requests)
+            subject_rows = self._subject_rows()
+        statuses = defaultdict(int)
+        for sample in requests:
+            statuses[str(sample["status"])] += 1
+        return {
+            "started": self.started,
+            "finished": datetime.now().isoformat(timespec="seconds"),
+            "requests": {
+                "count": len(requests),
+                "total_bytes": sum(s["bytes"] for s in requests),
+                "statuses": dict(sorted(statuses.items())),
+                **{field: distribution([s[field] for s in requests])
+                   for field in ("dns_ms", "connect_ms", "ttfb_ms", "total_ms", "bytes")},
+            },
+            "subjects": {
+                "count": len(subject_rows),
+                **{field: distribution([r[field] for r in subject_rows])
+                   for field in ("fetch_ms", "parse_ms", "write_ms")},
+                **{field: sum(r[field] or 0 for r in subject_rows)
+                   for field in ("courses", "sections", "prereq_links")},
+            },
+            # Where the time goes: subjects by fetch + parse + write time
+            "slowest_subjects": [
+                {"subject": r["subject"], "fetch_ms": r["fetch_ms"],
+                 "parse_ms": r["parse_ms"], "write_ms": r["write_ms"]}
+                for r in sorted(
+                    subject_rows,
+                    key=lambda r: (r["fetch_ms"] or 0) + (r["parse_ms"] or 0) + (r["write_ms"] or 0),
+                    reverse=True,
+                )[:top]
+            ],
+        }
+
+    def write_report(self, path=DEFAULT_REPORT_PATH):
+        """Write <path>.json, <path>_requests.csv and <path>_subjects.csv. Returns the summary."""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        summary = self.summary()
+        with self._lock:
+            requests = list(self.requests)
+            subject_rows = self._subject_rows()
+
+        with open(f"{path}_requests.csv", "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=REQUEST_FIELDS)
+            writer.writeheader()
+            writer.writerows(requests)
+        with open(f"{path}_subjects.csv", "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=SUBJECT_FIELDS)
+            writer.writeheader()
+            writer.writerows(subject_rows)
+        with open(f"{path}.json", "w") as f:
+            json.dump(summary, f, indent=2)
+        return summary
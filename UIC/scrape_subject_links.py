@@ -1,9 +1,23 @@
 import os
+import argparse
+from time import perf_counter
 import requests
+import http_client
+from http_cache import ResponseCache, DEFAULT_CACHE_DIR
+from snapshots import SnapshotStore
+from schedule_parser import BACKENDS, extract_course_blocks
+from run_manifest import RunManifest, DEFAULT_MANIFEST_PATH
+from term_window import TermState, DEFAULT_TERM_STATE_PATH, discover_terms, term_sort_key
+from subject_names import SubjectNameCache, DEFAULT_NAME_CACHE_PATH, extract_subject_name
+from scrape_metrics import RunMetrics, DEFAULT_REPORT_PATH
+from build_combined_json import DEFAULT_BUILD_MANIFEST_PATH
 from bs4 import BeautifulSoup
 import re
 from datetime import datetime
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from urllib.parse import urlsplit
 import json
 
 COREQ_PHRASES = re.compile(r'\b(concurrent registration|co-?requisite|corequisite)\b', re.IGNORECASE)
@@ -19,6 +33,7 @@ def generate_terms(start_year, end_year):
     return terms
 
 # Adjust these 2 values to control scraping range
+# (the CLI discovers published terms from start_year on; see term_window.py)
 start_year = 2024
 end_year = 2025
 TERMS = generate_terms(start_year, end_year)
@@ -26,34 +41,41 @@ TERMS = generate_terms(start_year, end_year)
 
 BASE_URL = "https://webcs7.osss.uic.edu/schedule-of-classes/static/schedules"
 
-def generate_term_urls(subject):
+# Ceiling for simultaneous requests sent to any single host; the adaptive
+# limiter in http_client starts lower and grows toward it while the server
+# keeps up (and backs off on 429/503s, timeouts and latency spikes)
+MAX_CONNECTIONS_PER_HOST = 8
+
+def generate_term_urls(subject, terms=None):
     return {
         f"{term}-{year}": f"{BASE_URL}/{term}-{year}/{subject}.html"
-        for term, year in TERMS
+        for term, year in (TERMS if terms is None else terms)
     }
 
 
-# Request headers to avoid being blocked
-HEADERS = {
-    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-}
-
-master = {}
-offering_term = {}  # norm_code → "fall" or "spring"
-excluded_courses = set()  # courses seen in both terms
-seen_in_term = defaultdict(set)  # term → set of course codes seen in that term
-timing_fall = defaultdict(list)
-timing_spring = defaultdict(list)
-latest_prereq_year = {}  # norm_code → year
-prereq_map = {}          # norm_code → set of (prereq, flag)
-
-
-# Also store term tracking for fallback
-latest_fall_year = {}
-latest_spring_year = {}
+@dataclass
+class ScrapeState:
+    """Everything collected for one subject while parsing its term pages.
 
-prereqs = set()
-all_seen_terms = defaultdict(set)  # norm_code → set of terms like "fall-2022"
+    A fresh state is created per subject, so subjects can be scraped
+    independently (and in separate processes).
+    """
+    subject: str
+    valid_subjects: set = field(default_factory=set)  # e.g., {"CS", "MATH", "ECE", ...}
+    master: dict = field(default_factory=dict)  # "CS 141" → credit string
+    offering_term: dict = field(default_factory=dict)  # norm_code → "fall", "spring" or "both"
+    seen_in_term: defaultdict = field(default_factory=lambda: defaultdict(set))  # norm_code → {"fall", "spring"}
+    timing_fall: defaultdict = field(default_factory=lambda: defaultdict(list))
+    timing_spring: defaultdict = field(default_factory=lambda: defaultdict(list))
+    latest_prereq_year: dict = field(default_factory=dict)  # norm_code → year
+    prereq_map: dict = field(default_factory=dict)  # norm_code → set of (prereq, course, flag)
+    # Also store term tracking for fallback
+    latest_fall_year: dict = field(default_factory=dict)
+    latest_spring_year: dict = field(default_factory=dict)
+    all_seen_terms: defaultdict = field(default_factory=lambda: defaultdict(set))  # norm_code → set of terms like "fall-2022"
+    outputs_written: bool = False  # set by write_outputs once all files are in place
+    # Timing/counts for the run report: parse_ms, write_ms, sections
+    metrics: defaultdict = field(default_factory=lambda: defaultdict(float))
 
 
 
@@ -110,32 +132,95 @@ def normalize_course_code(subject, course_number):
     return f"{subject}{'_' * underscores_needed}{course_number}"
 
 
-def parse_course_table(url, term, year, subject):
+def _download(url, cache):
+    if cache is None:
+        response = http_client.get(url)
+        response.raise_for_status()
+        return response.text, True
+    cached = cache.fetch(url)
+    if cached.text is None:
+        print(f"Failed to fetch {url}: HTTP {cached.status}")
+    return cached.text, cached.changed
+
+
+def fetch_page(url, cache=None, reuse_cached=None):
+    """Download one schedule page.
+
+    Returns (html, changed). html is None on failure; changed is False only
+    when the response cache confirms the page matches the previous run.
+    If reuse_cached is True/False, a cached copy is returned without any
+    request and reported with that `changed` value.
+    """
+    if reuse_cached is not None and cache is not None:
+        cached = cache.peek(url)
+        if cached is not None:
+            return cached.text, reuse_cached
+    try:
+        print(f"Fetching {url}")
+        return _download(url, cache)
+    except requests.RequestException as e:
+        print(f"Failed to fetch {url}: {e}")
+        return None, True
+
+
+def subject_of_url(url):
+    """Subject of a schedule page URL (".../<term>/<SUBJ>.html"); None for index pages."""
+    name = os.path.splitext(os.path.basename(urlsplit(url).path))[0]
+    return None if name == "index" else name
+
+
+def fetch_all_pages(subjects, max_per_host=MAX_CONNECTIONS_PER_HOST, cache=None, reuse=None):
+    """Start downloading every (subject, term) page concurrently.
+
+    Returns (executor, {subject: {term_key: Future}}). Each future resolves to
+    fetch_page's (html, changed) pair. Callers consume the futures in whatever
+    order they need, so parsing can overlap with the remaining downloads.
+    `reuse` maps (subject, term_key) → changed flag for pages that should be
+    served from the cache when possible (see fetch_page).
+    Per-host pacing is done by http_client's adaptive limiter; the pool only
+    needs enough threads to fill every host's window.
+    """
+    reuse = reuse or {}
+    term_urls = {subject: generate_term_urls(subject) for subject in subjects}
+    hosts = {urlsplit(url).netloc for urls in term_urls.values() for url in urls.values()}
+    executor = ThreadPoolExecutor(max_workers=max(1, max_per_host) * max(1, len(hosts)))
+
+    futures = {}
+    for subject in sorted(subjects):
+        futures[subject] = {
+            term_key: executor.submit(fetch_page, url, cache, reuse.get((subject, term_key)))
+            for term_key, url in term_urls[subject].items()
+        }
+    return executor, futures
+
+
+def parse_course_table(state, url, term, year, html=None, parser="auto"):
     """Parse a single subject's schedule page for a given term/year.
        - Captures concrete lecture timings (LEC/LCD/LBD, etc.)
        - If offered but no concrete time (ARRANGED/CNF), inserts placeholder (0,0)
        - Keeps 'latest year wins' behavior per term (fall/spring)
+       - `html` may be passed in when the page was already downloaded
+       - `parser` selects the HTML backend (see schedule_parser.BACKENDS)
+       Returns the updated state.
     """
+    subject = state.subject
+    started = None
     try:
-        print(f"Fetching {url}")
-        response = requests.get(url, headers=HEADERS, timeout=10)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.text, "html.parser")
-
-        # Try to locate course containers
-        courses = soup.find_all("div", class_="course")
-        if not courses:
-            courses = soup.find_all("div", class_="course-block")
-        if not courses:
-            # Fallback: entire page tables (some pages are just big tables)
-            courses = soup.find_all("table")
+        if html is None:
+            html, _ = fetch_page(url)
+            if html is None:
+                return state
+
+        started = perf_counter()
+        # Course containers (div.course / div.course-block, else whole tables)
+        courses = extract_course_blocks(html, parser)
         if not courses:
             print("No courses found on page.")
-            return
+            return state
 
         for i, course in enumerate(courses):
             try:
-                text = course.get_text(" ", strip=True)
+                text = course.text
 
                 # Find "[SUBJ] [NNN]"
                 match = re.search(rf"\b{subject}\s+(\d{{3}})\b", text)
@@ -149,7 +234,7 @@ def parse_course_table(url, term, year, subject):
                 # ===== Prerequisites (latest year wins) =====
                 prereq_match = re.search(r"Prerequisite\s*\(s\):\s*(.+)", text, re.IGNORECASE)
                 if prereq_match:
-                    if norm_code not in latest_prereq_year or year > latest_prereq_year[norm_code]:
+                    if norm_code not in state.latest_prereq_year or year > state.latest_prereq_year[norm_code]:
                         prereq_text = prereq_match.group(1)
 
                         # Split the prereq line into segments; we’ll classify each segment.
@@ -168,7 +253,7 @@ def parse_course_table(url, term, year, subject):
                             # pull all course refs in the segment
                             course_refs = re.findall(r"\b([A-Z]{2,5})\s+(\d{3})\b", seg)
                             for dept, num in course_refs:
-                                if dept not in VALID_SUBJECTS:
+                                if dept not in state.valid_subjects:
                                     continue
                                 prereq_code = normalize_course_code(dept, num)
                                 if prereq_code == norm_code:
@@ -177,8 +262,8 @@ def parse_course_table(url, term, year, subject):
                                 flag = 0 if is_coreq else -1   # 0 = coreq, -1 = prereq
                                 current_links.add((prereq_code, norm_code, flag))
 
-                        prereq_map[norm_code] = current_links
-                        latest_prereq_year[norm_code] = year
+                        state.prereq_map[norm_code] = current_links
+                        state.latest_prereq_year[norm_code] = year
 
 
                 # ===== Credits extraction (range or single) =====
@@ -191,14 +276,12 @@ def parse_course_table(url, term, year, subject):
                 else:
                     single_match = re.search(r"(\d+(?:\.\d+)?)\s+hours", text, re.IGNORECASE)
                     credit = single_match.group(1) if single_match else "???"
-                master[code] = credit
+                state.master[code] = credit
 
                 # ===== Rows parsing (sections/times) =====
-                rows = course.find_all("tr")
-                if not rows:
-                    # Some course blocks might not have a table
-                    # We still allow placeholder logic below if CNF/LEC appears in text
-                    rows = []
+                # Some course blocks might not have a table (rows == [])
+                # We still allow placeholder logic below if CNF/LEC appears in text
+                rows = course.rows
 
                 captured_any_time = False       # parsed at least one concrete timing block
                 offered_any_section = False     # course has a relevant section this term
@@ -209,12 +292,10 @@ def parse_course_table(url, term, year, subject):
                 # Only these types produce concrete timing blocks
                 keep_types = {"LEC", "LEC-DIS", "LEC/LAB", "LCD"}
 
-                for row in rows:
-                    cols = row.find_all('td')
-                    if len(cols) < 6:
+                for col_texts in rows:
+                    if len(col_texts) < 6:
                         continue
 
-                    col_texts = [col.get_text(strip=True) for col in cols]
                     crn = col_texts[0]
                     course_type = col_texts[1].strip().upper()
                     time = col_texts[2]
@@ -223,6 +304,7 @@ def parse_course_table(url, term, year, subject):
                     # Offered if we see any relevant type
                     if any(t in course_type for t in relevant_types):
                         offered_any_section = True
+                        state.metrics["sections"] += 1
                         if not representative_crn:
                             representative_crn = crn
 
@@ -238,17 +320,17 @@ def parse_course_table(url, term, year, subject):
                     for start_min, end_min in time_blocks:
                         captured_any_time = True
                         if term == "fall":
-                            if norm_code not in latest_fall_year or year > latest_fall_year[norm_code]:
-                                timing_fall[norm_code] = [(crn, start_min, end_min)]
-                                latest_fall_year[norm_code] = year
-                            elif year == latest_fall_year[norm_code]:
-                                timing_fall[norm_code].append((crn, start_min, end_min))
+                            if norm_code not in state.latest_fall_year or year > state.latest_fall_year[norm_code]:
+                                state.timing_fall[norm_code] = [(crn, start_min, end_min)]
+                                state.latest_fall_year[norm_code] = year
+                            elif year == state.latest_fall_year[norm_code]:
+                                state.timing_fall[norm_code].append((crn, start_min, end_min))
                         elif term == "spring":
-                            if norm_code not in latest_spring_year or year > latest_spring_year[norm_code]:
-                                timing_spring[norm_code] = [(crn, start_min, end_min)]
-                                latest_spring_year[norm_code] = year
-                            elif year == latest_spring_year[norm_code]:
-                                timing_spring[norm_code].append((crn, start_min, end_min))
+                            if norm_code not in state.latest_spring_year or year > state.latest_spring_year[norm_code]:
+                                state.timing_spring[norm_code] = [(crn, start_min, end_min)]
+                                state.latest_spring_year[norm_code] = year
+                            elif year == state.latest_spring_year[norm_code]:
+                                state.timing_spring[norm_code].append((crn, start_min, end_min))
 
                 # ===== FLEXIBLE-TIME PLACEHOLDER =====
                 # If the course is offered in this term but we captured no concrete times,
@@ -256,194 +338,298 @@ def parse_course_table(url, term, year, subject):
                 if offered_any_section and not captured_any_time:
                     placeholder_crn = representative_crn or "00000"
                     if term == "fall":
-                        if norm_code not in latest_fall_year or year >= latest_fall_year[norm_code]:
-                            timing_fall[norm_code] = [(placeholder_crn, 0, 0)]
-                            latest_fall_year[norm_code] = year
+                        if norm_code not in state.latest_fall_year or year >= state.latest_fall_year[norm_code]:
+                            state.timing_fall[norm_code] = [(placeholder_crn, 0, 0)]
+                            state.latest_fall_year[norm_code] = year
                     elif term == "spring":
-                        if norm_code not in latest_spring_year or year >= latest_spring_year[norm_code]:
-                            timing_spring[norm_code] = [(placeholder_crn, 0, 0)]
-                            latest_spring_year[norm_code] = year
+                        if norm_code not in state.latest_spring_year or year >= state.latest_spring_year[norm_code]:
+                            state.timing_spring[norm_code] = [(placeholder_crn, 0, 0)]
+                            state.latest_spring_year[norm_code] = year
 
                 # Mark seen/offered for this term if we found any relevant section
                 if offered_any_section:
-                    seen_in_term[norm_code].add(term)
-                    all_seen_terms[norm_code].add(f"{term}-{year}")
+                    state.seen_in_term[norm_code].add(term)
+                    state.all_seen_terms[norm_code].add(f"{term}-{year}")
 
             except Exception as e:
                 print(f"Error processing course block #{i}: {e}")
                 continue
 
-    except requests.RequestException as e:
-        print(f"Failed to fetch {url}: {e}")
     except Exception as e:
         print(f"Error parsing {url}: {e}")
+    finally:
+        if started is not None:
+            state.metrics["parse_ms"] += (perf_counter() - started) * 1000
 
+    return state
 
 
-def write_outputs(subject):
-    # Create subfolder for this subject
-    major_dir = os.path.join("UIC/data/subjects", subject)
-    os.makedirs(major_dir, exist_ok=True)
-
-    """Write output files"""
-    try:
-        # Course offerings
-        with open(os.path.join(major_dir, f"courseoffering_{subject}.txt"), "w") as f:
-            # print(f"[DEBUG] Sample offering_term: {list(offering_term.items())[:3]}")
-            for code in sorted(offering_term.keys()):
-                # ✅ Skip if course is not from this subject
-                if not code.startswith(subject + "_"):
-                    continue
 
-                term = offering_term[code]
-                if term == "both":
-                    continue  # ❌ skip courses offered in both terms
+SUBJECT_FILES = ("courseoffering", "coursetiming", "prerequisites", "mastercourselist")
 
-                fall = 1 if term == "fall" else 0
-                spring = 1 if term == "spring" else 0
-                f.write(f"{code}\t{fall}\t{spring}\n")
 
+def subject_output_paths(subject, base_dir="UIC/data/subjects"):
+    """Paths of the four files write_outputs produces for `subject`."""
+    major_dir = os.path.join(base_dir, subject)
+    return [os.path.join(major_dir, f"{prefix}_{subject}.txt") for prefix in SUBJECT_FILES]
 
-        #print(f"Wrote {len(offering_term)} course offerings")
-        
-        # Group all (start, end) pairs per course, ignoring CRNs
-        #course_timings = defaultdict(set)  # course_code → set of (start, end)
 
-        # Group all (start, end) pairs per course but preserve CRNs
+def subject_rows(state):
+    """The rows of the four per-subject files, as lists of string fields.
 
-        with open(os.path.join(major_dir, f"coursetiming_{subject}.txt"), "w") as f:
-            for course_code in sorted(set(timing_fall.keys()) | set(timing_spring.keys())):
-                for term, timing_dict in [("fall", timing_fall), ("spring", timing_spring)]:
-                    if course_code not in timing_dict:
-                        continue
+    write_outputs joins them with tabs; the in-process pipeline hands them
+    to tsv_loader's *_from_rows parsers directly.
+    """
+    subject = state.subject
+    rows = {name: [] for name in SUBJECT_FILES}
+
+    # Course offerings
+    # print(f"[DEBUG] Sample offering_term: {list(state.offering_term.items())[:3]}")
+    for code in sorted(state.offering_term.keys()):
+        # ✅ Skip if course is not from this subject
+        if not code.startswith(subject + "_"):
+            continue
 
-                    sessions = timing_dict[course_code]
-                    if not sessions:
-                        continue
+        term = state.offering_term[code]
+        if term == "both":
+            continue  # ❌ skip courses offered in both terms
 
-                    # Group by CRN
-                    crn_sessions = defaultdict(list)
-                    for crn, start, end in sessions:
-                        crn_sessions[crn].append((start, end))
+        fall = 1 if term == "fall" else 0
+        spring = 1 if term == "spring" else 0
+        rows["courseoffering"].append([code, str(fall), str(spring)])
 
-                    num_sections = len(crn_sessions)
+    #print(f"Wrote {len(state.offering_term)} course offerings")
 
-                    for crn, blocks in sorted(crn_sessions.items()):
-                        f.write(f"{course_code}\t{term}\t{num_sections}\t{len(blocks)}")
-                        for start, end in blocks:
-                            f.write(f"\t{crn}\t{start}\t{end}")
-                        f.write("\n")
+    # Group all (start, end) pairs per course but preserve CRNs
+    for course_code in sorted(set(state.timing_fall.keys()) | set(state.timing_spring.keys())):
+        for term, timing_dict in [("fall", state.timing_fall), ("spring", state.timing_spring)]:
+            if course_code not in timing_dict:
+                continue
 
+            sessions = timing_dict[course_code]
+            if not sessions:
+                continue
 
-        
-        # Clean and filter prereqs
-        # Flatten prereq_map into list
-        prereqs_cleaned = [
-            (prereq, course, flag)
-            for course, prereq_set in prereq_map.items()
-            for (prereq, course, flag) in prereq_set
-        ]
-
-
-        # Sort: first by course (middle column), then by prereq (left column)
-        prereqs_sorted = sorted(
-            prereqs_cleaned,
-            key=lambda x: (
-                int(x[1][-3:]),  # course number (last 3 chars)
-                int(x[0][-3:])   # prereq number (last 3 chars)
-            )
+            # Group by CRN
+            crn_sessions = defaultdict(list)
+            for crn, start, end in sessions:
+                crn_sessions[crn].append((start, end))
+
+            num_sections = len(crn_sessions)
+
+            for crn, blocks in sorted(crn_sessions.items()):
+                row = [course_code, term, str(num_sections), str(len(blocks))]
+                for start, end in blocks:
+                    row += [f"{crn}", f"{start}", f"{end}"]
+                rows["coursetiming"].append(row)
+
+    # Clean and filter prereqs
+    # Flatten prereq_map into list
+    prereqs_cleaned = [
+        (prereq, course, flag)
+        for course, prereq_set in state.prereq_map.items()
+        for (prereq, course, flag) in prereq_set
+    ]
+
+    # Sort: first by course (middle column), then by prereq (left column)
+    prereqs_sorted = sorted(
+        prereqs_cleaned,
+        key=lambda x: (
+            int(x[1][-3:]),  # course number (last 3 chars)
+            int(x[0][-3:])   # prereq number (last 3 chars)
         )
+    )
+    for prereq, course, flag in prereqs_sorted:
+        rows["prerequisites"].append([f"{prereq}", f"{course}", f"{flag}"])
+
+    #print(f"Wrote {len(prereqs)} prerequisite placeholders")
+
+    # Rebuild master course list from offering_term, timings, and prereqs
+    added = set()
+
+    # Gather all seen course codes
+    all_seen = (
+        set(state.seen_in_term.keys()) |
+        set(state.timing_fall.keys()) |
+        set(state.timing_spring.keys())
+    )
+
+    # Only include prereqs that belong to the current subject
+    prereq_courses = {
+        prereq for prereq, _, _ in prereqs_cleaned
+        if prereq.startswith(subject + "_")
+    }
 
-        # Write prerequisites file
-        with open(os.path.join(major_dir, f"prerequisites_{subject}.txt"), "w") as f:
-            for prereq, course, flag in prereqs_sorted:
-                f.write(f"{prereq}\t{course}\t{flag}\n")
-
-
-
-        #print(f"Wrote {len(prereqs)} prerequisite placeholders")
-
-        # Rebuild master course list from offering_term and timings keys
-                # Rebuild master course list from offering_term, timings, and prereqs
-        with open(os.path.join(major_dir, f"mastercourselist_{subject}.txt"), "w") as f:
-            added = set()
-
-            # Gather all seen course codes
-            all_seen = (
-                set(seen_in_term.keys()) |
-                set(timing_fall.keys()) |
-                set(timing_spring.keys())
-            )
-
-
-            # Only include prereqs that belong to the current subject
-            prereq_courses = {
-                prereq for prereq, _, _ in prereqs_cleaned
-                if prereq.startswith(subject + "_")
-            }
-
-
-
-            all_codes = all_seen | prereq_courses
-
-            for code in sorted(all_codes):
-                if len(code) != 8 or code in added:
-                    continue
-                subject_part = code.rstrip('_0123456789')
-                number_part = code[-3:]
-                original_format = f"{subject_part} {number_part}"
-                if original_format in master:
-                    credit = master[original_format]
-                else:
-                    credit = "???"
-                    # Try live UIC catalog lookup if missing
-                    # fetched = get_credit_from_uic_catalog(subject_part, number_part)
-                    # if fetched != "???":
-                    #     credit = fetched
-                if credit == "???" or not credit:
-                    continue  # ❌ Skip courses without valid credit
-
-                f.write(f"{code}\t{credit}\n")
-                added.add(code)
-
+    all_codes = all_seen | prereq_courses
 
+    for code in sorted(all_codes):
+        if len(code) != 8 or code in added:
+            continue
+        subject_part = code.rstrip('_0123456789')
+        number_part = code[-3:]
+        original_format = f"{subject_part} {number_part}"
+        if original_format in state.master:
+            credit = state.master[original_format]
+        else:
+            credit = "???"
+            # Try live UIC catalog lookup if missing
+            # fetched = get_credit_from_uic_catalog(subject_part, number_part)
+            # if fetched != "???":
+            #     credit = fetched
+        if credit == "???" or not credit:
+            continue  # ❌ Skip courses without valid credit
+
+        rows["mastercourselist"].append([code, f"{credit}"])
+        added.add(code)
+
+    #print(f"Wrote {len(added)} to mastercourselist_{subject}.txt")
+    return rows
+
+
+def write_outputs(state, base_dir="UIC/data/subjects", rows=None):
+    """Write the four per-subject output files. Returns the state.
+
+    `rows` are subject_rows(state), computed here when not passed in.
+    Files are written to *.tmp first and renamed into place only once all
+    four are complete, so an interrupted run never leaves a half-written
+    subject behind. state.outputs_written reports success.
+    """
+    subject = state.subject
+    # Create subfolder for this subject
+    major_dir = os.path.join(base_dir, subject)
+    os.makedirs(major_dir, exist_ok=True)
+    final_paths = dict(zip(SUBJECT_FILES, subject_output_paths(subject, base_dir)))
+    tmp_paths = {name: f"{path}.tmp" for name, path in final_paths.items()}
+    started = perf_counter()
 
+    try:
+        if rows is None:
+            rows = subject_rows(state)
+        for name in SUBJECT_FILES:
+            with open(tmp_paths[name], "w") as f:
+                f.writelines("\t".join(row) + "\n" for row in rows[name])
 
-        #print(f"Wrote {len(added)} to mastercourselist_{subject}.txt")
+        for name, path in final_paths.items():
+            os.replace(tmp_paths[name], path)
+        state.outputs_written = True
 
-        
     except Exception as e:
         print(f"Error writing output files: {e}")
+        for tmp_path in tmp_paths.values():
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    state.metrics["write_ms"] += (perf_counter() - started) * 1000
+    return state
+
+
+
+def resolve_offering_terms(state):
+    """Determine the offering term ("fall", "spring" or "both") for each course."""
+    for norm_code, terms in state.all_seen_terms.items():
+        offered_fall = any(t.startswith("fall") for t in terms)
+        offered_spring = any(t.startswith("spring") for t in terms)
+
+        if offered_fall and offered_spring:
+            state.offering_term[norm_code] = "both"
+        elif offered_fall:
+            state.offering_term[norm_code] = "fall"
+        elif offered_spring:
+            state.offering_term[norm_code] = "spring"
+    return state
+
+
+def subject_name_from_pages(pages, terms=None):
+    """Read the subject name off the newest downloaded page that shows one."""
+    terms = TERMS if terms is None else terms
+    for term, year in sorted(terms, key=term_sort_key, reverse=True):
+        html = pages.get(f"{term}-{year}")
+        if html is not None:
+            name = extract_subject_name(html)
+            if name:
+                return name
+    return None
+
+
+def scrape_subject(subject, pages, valid_subjects, base_dir="UIC/data/subjects", terms=None, parser="auto",
+                   capture_name=False, write_tsv=True, return_rows=False):
+    """Parse one subject's downloaded pages and write its output files.
+
+    `pages` maps "term-year" → HTML (or None if the download failed);
+    `terms` defaults to TERMS. Returns (written, metrics, name, rows): written
+    is True once the outputs are in place, metrics holds parse/write time and
+    counts for the run report, name is the subject's readable name when
+    capture_name is set, and rows is subject_rows() when return_rows is set
+    (both None otherwise). write_tsv=False skips the files altogether.
+    Module-level so it can run in a ProcessPoolExecutor worker.
+    """
+    print(f"\n=== Scraping {subject} ===")
+    state = ScrapeState(subject=subject, valid_subjects=set(valid_subjects))
+    terms = TERMS if terms is None else terms
+
+    term_urls = generate_term_urls(subject, terms)
+    # Terms are in year order, so "latest year wins" still holds
+    for term, year in terms:
+        term_key = f"{term}-{year}"
+        html = pages.get(term_key)
+        if html is None:
+            continue
+        parse_course_table(state, term_urls[term_key], term, year, html=html, parser=parser)
 
+    resolve_offering_terms(state)
+    rows = None
+    if return_rows:
+        try:
+            rows = subject_rows(state)
+        except Exception as e:
+            print(f"Error collecting rows for {subject}: {e}")
+    if write_tsv and (rows is not None or not return_rows):
+        write_outputs(state, base_dir, rows)
+    metrics = {
+        "parse_ms": round(state.metrics["parse_ms"], 2),
+        "write_ms": round(state.metrics["write_ms"], 2),
+        "courses": len(state.master),
+        "sections": int(state.metrics["sections"]),
+        "prereq_links": sum(len(links) for links in state.prereq_map.values()),
+        "written": state.outputs_written,
+    }
+    name = subject_name_from_pages(pages, terms) if capture_name else None
+    return state.outputs_written, metrics, name, rows
 
 
-def get_all_subjects():
-    base_url = "https://webcs7.osss.uic.edu/schedule-of-classes/static/schedules"
-    index_url = f"{base_url}/fall-2024/index.html"
+def get_all_subjects(terms=None):
+    """Subjects listed on the newest fall and spring index pages of `terms` (default TERMS).
 
-    try:
-        response = requests.get(index_url, headers=HEADERS, timeout=10)
-        response.raise_for_status()
+    Returns {subject: {"fall": url, "spring": url}}, pointing at the
+    subject's pages in the newest fall and spring term of the window.
+    """
+    base_url = BASE_URL
+    terms = TERMS if terms is None else terms
+    # Newest fall and newest spring of the (discovered) window
+    latest = {term: f"{term}-{year}" for term, year in sorted(terms, key=term_sort_key)}
+
+    subject_map = {}
+    for term_key in latest.values():
+        index_url = f"{base_url}/{term_key}/index.html"
+        try:
+            response = http_client.get(index_url)
+            response.raise_for_status()
+        except Exception as e:
+            print(f"[ERROR] Failed to load subject list {index_url}: {e}")
+            continue
         soup = BeautifulSoup(response.text, "html.parser")
 
-        subject_map = {}
-
         for a in soup.find_all("a", href=True):
             href = a["href"]
             match = re.match(r"([A-Z]{2,5})\.html$", href)
             if match:
                 subject = match.group(1)
                 subject_map[subject] = {
-                    "fall": f"{base_url}/fall-2024/{subject}.html",
-                    "spring": f"{base_url}/spring-2025/{subject}.html"
+                    term: f"{base_url}/{key}/{subject}.html" for term, key in latest.items()
                 }
 
-        print(f"[INFO] Found {len(subject_map)} subjects")
-        return subject_map
-
-    except Exception as e:
-        print(f"[ERROR] Failed to load subject list: {e}")
-        return {}
+    print(f"[INFO] Found {len(subject_map)} subjects in {', '.join(latest.values())}")
+    return subject_map
 
 
 
@@ -451,7 +637,7 @@ def get_all_subjects():
 def debug_page_structure(url):
     """Debug function to inspect page structure"""
     try:
-        response = requests.get(url, headers=HEADERS, timeout=10)
+        response = http_client.get(url)
         response.raise_for_status()
         soup = BeautifulSoup(response.text, "html.parser")
         
@@ -477,61 +663,238 @@ def debug_page_structure(url):
 
 
 if __name__ == "__main__":
-    subjects = get_all_subjects()
-    VALID_SUBJECTS = set(subjects)  # e.g., {"CS", "MATH", "ECE", ...}
-
-    for subject in sorted(subjects):
-        if subject not in subjects:
-            print(f"[SKIP] {subject} not found in subject list")
-            continue
-
-        urls = subjects[subject]
-
-        print(f"\n=== Scraping {subject} ===")
-
-        # Clear data between subjects
-        master.clear()
-        offering_term.clear()
-        excluded_courses.clear()
-        timing_fall.clear()
-        timing_spring.clear()
-        latest_fall_year.clear()
-        latest_spring_year.clear()
-        offering_term.clear()
-        prereqs.clear()
-        seen_in_term.clear()
-        latest_prereq_year.clear()
-        prereq_map.clear()
-        all_seen_terms.clear()
-
-
-
-
-        term_urls = generate_term_urls(subject)
-        for term, year in TERMS:
-            term_key = f"{term}-{year}"
-            if term_key not in term_urls:
-                continue
-            parse_course_table(term_urls[term_key], term, year, subject)
-
-
-
-        # Determine offering term for each course
-        for norm_code, terms in all_seen_terms.items():
-            offered_fall = any(t.startswith("fall") for t in terms)
-            offered_spring = any(t.startswith("spring") for t in terms)
-
-            if offered_fall and offered_spring:
-                offering_term[norm_code] = "both"
-            elif offered_fall:
-                offering_term[norm_code] = "fall"
-            elif offered_spring:
-                offering_term[norm_code] = "spring"
-
-
-        
-
-        write_outputs(subject)
+    parser = argparse.ArgumentParser(description="Scrape UIC schedule pages into per-subject TSV files")
+    parser.add_argument("--max-per-host", type=int, default=MAX_CONNECTIONS_PER_HOST,
+                        help="ceiling for concurrent requests per host (default: %(default)s)")
+    parser.add_argument("--rate", type=float, default=5.0,
+                        help="initial requests/second per host; adapts up/down during the run "
+                             "(default: %(default)s)")
+    parser.add_argument("--max-rate", type=float, default=50.0,
+                        help="upper bound for the adaptive request rate (default: %(default)s)")
+    parser.add_argument("--base-url", default=BASE_URL,
+                        help="schedule root URL, e.g. a local mirror for testing")
+    parser.add_argument("--processes", type=int, default=1,
+                        help="parse and write subjects in this many worker processes "
+                             "(0 = one per CPU core, default: %(default)s)")
+    parser.add_argument("--retries", type=int, default=3,
+                        help="retries for 5xx responses and timeouts (default: %(default)s)")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR,
+                        help="on-disk HTTP cache for conditional GETs (default: %(default)s)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="always download and re-parse every page")
+    parser.add_argument("--snapshot", metavar="DIR",
+                        help="also save every fetched page into a snapshot store at DIR")
+    parser.add_argument("--replay", metavar="DIR",
+                        help="parse pages from the snapshot store at DIR instead of the network")
+    parser.add_argument("--output-dir", default="UIC/data/subjects",
+                        help="where per-subject files are written (default: %(default)s)")
+    parser.add_argument("--parser", choices=BACKENDS, default="auto",
+                        help="HTML parser backend; auto = lxml when installed (default: %(default)s)")
+    parser.add_argument("--manifest", default=DEFAULT_MANIFEST_PATH,
+                        help="run checkpoint file (default: %(default)s)")
+    parser.add_argument("--resume", action="store_true",
+                        help="continue an interrupted run, skipping subjects already written")
+    parser.add_argument("--since", type=int, default=start_year,
+                        help="earliest year to scrape; later terms are discovered (default: %(default)s)")
+    parser.add_argument("--term-state", default=DEFAULT_TERM_STATE_PATH,
+                        help="record of ingested/frozen terms (default: %(default)s)")
+    parser.add_argument("--all-terms", action="store_true",
+                        help="request every term, including frozen ones")
+    parser.add_argument("--name-cache", default=DEFAULT_NAME_CACHE_PATH,
+                        help="subject name cache read by build_combined_json.py (default: %(default)s)")
+    parser.add_argument("--metrics-report", default=DEFAULT_REPORT_PATH, metavar="PATH",
+                        help="write PATH.json plus per-request/per-subject CSVs at the end "
+                             "(default: %(default)s; '' to disable)")
+    parser.add_argument("--json", metavar="PATH",
+                        help="also stream the catalog straight into this JSON file "
+                             "(e.g. UIC/data/combined.json), without re-reading the TSVs")
+    parser.add_argument("--duckdb", metavar="PATH",
+                        help="also load the catalog straight into this DuckDB file "
+                             "(e.g. UIC/data/combined.duckdb)")
+    parser.add_argument("--compact", action="store_true",
+                        help="write --json output without indentation")
+    parser.add_argument("--json-manifest", default=DEFAULT_BUILD_MANIFEST_PATH, metavar="PATH",
+                        help="build manifest for the --json output, read by build_combined_json.py "
+                             "(default: %(default)s)")
+    parser.add_argument("--no-tsv", action="store_true",
+                        help="with --json/--duckdb: do not write the per-subject TSV files")
+    parser.add_argument("--parquet", metavar="DIR",
+                        help="with --duckdb: also export the catalog to partitioned Parquet "
+                             "(e.g. UIC/data/parquet)")
+    args = parser.parse_args()
+    if args.no_tsv and not (args.json or args.duckdb):
+        parser.error("--no-tsv needs --json and/or --duckdb")
+    if args.parquet and not args.duckdb:
+        parser.error("--parquet needs --duckdb")
+    BASE_URL = args.base_url.rstrip("/")
+    # Keep one pooled keep-alive connection per concurrent request
+    max_per_host = max(1, args.max_per_host)
+    http_client.configure(
+        pool_maxsize=max_per_host,
+        retries=args.retries,
+        max_per_host=max_per_host,
+        start_per_host=min(4, max_per_host),
+        rate=args.rate,
+        max_rate=max(args.rate, args.max_rate),
+    )
+
+    metrics = RunMetrics(subject_of=subject_of_url)
+    if args.metrics_report:
+        http_client.set_observer(metrics.record_request)
+
+    executor = None
+    cache = None
+    snapshot = None
+    if args.replay:
+        replay = SnapshotStore(args.replay)
+        subjects = replay.subjects()
+        TERMS = replay.terms()
+        print(f"[INFO] Replaying {len(subjects)} subjects from {args.replay}")
+    else:
+        discovered = discover_terms(BASE_URL, args.since)
+        if discovered:
+            TERMS = discovered
+        else:
+            print("[WARN] No terms discovered; using the configured start_year/end_year window")
+            TERMS = generate_terms(args.since, max(args.since, end_year))
+        subjects = get_all_subjects(TERMS)
+    valid_subjects = set(subjects)  # e.g., {"CS", "MATH", "ECE", ...}
+    term_state = TermState(args.term_state)
+
+    # Names are read off pages we download anyway; only subjects without one are parsed for it
+    name_cache = SubjectNameCache(args.name_cache)
+
+    def needs_name(subject):
+        return name_cache.get(subject) in (None, subject.lower())
+
+    manifest = RunManifest(args.manifest)
+    resumed = manifest.start(TERMS, resume=args.resume)
+    todo = [subject for subject in sorted(subjects) if not manifest.is_written(subject)]
+    if resumed:
+        print(f"[INFO] Resuming: {len(subjects) - len(todo)} subjects already written, {len(todo)} to go")
+
+    if not args.replay:
+        cache = None if args.no_cache else ResponseCache(args.cache_dir)
+        if args.snapshot:
+            snapshot = SnapshotStore(args.snapshot)
+            snapshot.set_scope(subjects, TERMS)
+        # Frozen terms are not requested again: their pages come from the cache
+        # and count as unchanged. Pages the interrupted run already downloaded
+        # also come from the cache, but still force the subject to be re-parsed.
+        frozen, to_fetch = term_state.plan(TERMS)
+        if cache is None or args.all_terms:
+            frozen, to_fetch = [], list(TERMS)
+        print(f"[INFO] {len(TERMS)} terms: {len(frozen)} frozen, "
+              f"fetching {', '.join(f'{t}-{y}' for t, y in to_fetch) or 'none'}")
+        reuse = {}
+        for subject in todo:
+            for term, year in TERMS:
+                term_key = f"{term}-{year}"
+                if manifest.page_status(subject, term_key) is not None:
+                    reuse[(subject, term_key)] = True
+                elif (term, year) in frozen:
+                    reuse[(subject, term_key)] = False
+        # Downloads run in the background; parsing below consumes them subject by subject
+        executor, page_futures = fetch_all_pages(todo, args.max_per_host, cache, reuse)
+
+    processes = args.processes if args.processes > 0 else os.cpu_count()
+    pool = ProcessPoolExecutor(max_workers=processes) if processes > 1 else None
+
+    # Parsed subjects flow straight into combined.json / DuckDB (see catalog_pipeline.py)
+    sink = None
+    if args.json or args.duckdb:
+        # Imported here so a plain TSV scrape doesn't load DuckDB and the builders
+        from catalog_pipeline import CatalogSink
+        sink = CatalogSink(subjects, args.json, args.duckdb, args.compact, name_of=name_cache.get,
+                           base_dir=args.output_dir, parquet_dir=args.parquet,
+                           manifest_path=args.json_manifest, tsv=not args.no_tsv)
+        sink.expect(todo)
+
+    def record_result(subject, result):
+        written, subject_metrics, name, rows = result
+        metrics.record_subject(subject, subject_metrics)
+        name_cache.put(subject, name)
+        if written:
+            manifest.mark_written(subject)
+        if sink is not None:
+            sink.put(subject, rows)
+
+    pending = []
+    skipped = 0
+    try:
+        for subject in todo:
+            if args.replay:
+                pages = replay.pages(subject)
+            else:
+                fetched = {term_key: future.result() for term_key, future in page_futures.pop(subject).items()}
+                pages = {term_key: html for term_key, (html, _) in fetched.items()}
+                manifest.mark_fetched(subject, [k for k, html in pages.items() if html is not None])
+                if snapshot is not None:
+                    for term, year in TERMS:
+                        snapshot.put(subject, term, year, pages.get(f"{term}-{year}"))
+
+                # Every page revalidated (304 or same content hash) → existing outputs are current
+                # (with --no-tsv the files on disk may be from an older run, so always re-parse)
+                unchanged = cache is not None and not any(changed for _, changed in fetched.values())
+                if (unchanged and not args.no_tsv
+                        and all(os.path.exists(p) for p in subject_output_paths(subject, args.output_dir))):
+                    if needs_name(subject):
+                        name_cache.put(subject, subject_name_from_pages(pages, TERMS))
+                    manifest.mark_written(subject)
+                    if sink is not None:
+                        sink.put(subject)
+                    skipped += 1
+                    continue
 
-        seen_in_term.clear()
-    print("Done")
\ No newline at end of file
+            if pool is None:
+                record_result(subject, scrape_subject(subject, pages, valid_subjects,
+                                                      args.output_dir, TERMS, args.parser,
+                                                      needs_name(subject), not args.no_tsv,
+                                                      sink is not None))
+            else:
+                future = pool.submit(scrape_subject, subject, pages, valid_subjects,
+                                     args.output_dir, TERMS, args.parser, needs_name(subject),
+                                     not args.no_tsv, sink is not None)
+                future.add_done_callback(
+                    lambda f, subject=subject: f.cancelled() or f.exception() is not None
+                    or record_result(subject, f.result())
+                )
+                pending.append(future)
+
+        for future in pending:
+            future.result()
+        if sink is not None:
+            sink.close()
+        manifest.mark_complete()
+        if not args.replay:
+            term_state.record_ingested(TERMS)
+            term_state.save()
+    except BaseException:
+        if sink is not None:
+            sink.abort()
+        raise
+    finally:
+        # On Ctrl-C, drop queued work instead of waiting for it
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+        if cache is not None:
+            cache.save()
+        name_cache.save()
+        if snapshot is not None:
+            snapshot.save()
+        manifest.save()
+
+    if skipped:
+        print(f"[INFO] {skipped} subjects unchanged since the last run; kept existing outputs")
+    for host, stats in http_client.rate_metrics().items():
+        print(f"[INFO] {host}: {stats['rate_per_s']} req/s, window {stats['concurrency']}, "
+              f"latency {stats['latency_ms']} ms")
+    if args.metrics_report:
+        summary = metrics.write_report(args.metrics_report)
+        total = summary["requests"]["total_ms"]
+        print(f"[INFO] {summary['requests']['count']} requests, "
+              f"p50 {total['p50']} / p95 {total['p95']} / p99 {total['p99']} ms; "
+              f"report in {args.metrics_report}.json")
+    print("Done")
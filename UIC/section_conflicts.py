@@ -0,0 +1,153 @@
+import heapq
+from collections import defaultdict
+
+from duckdb_batch import ColumnBatch
+
+# Precomputed section time conflicts of a DuckDB catalog.
+#
+# A section is one (course_id, term, group_idx) of `timings`, i.e. one CRN.
+# Many sections meet at exactly the same times (MWF 10:00-10:50, ...), and
+# whether two sections overlap depends only on those times, so sections are
+# grouped into meeting patterns and conflicts are stored per pattern pair:
+#
+#   meeting_patterns(pattern_id, term, meetings)
+#       each distinct set of meetings, as [start, end, start, end, ...]
+#   section_patterns(subject, term, course_id, group_idx, crn, pattern_id)
+#       every section with at least one real meeting (0/0 placeholders
+#       never conflict)
+#   pattern_conflicts(pattern_a, pattern_b)
+#       patterns with overlapping meetings, both directions, including each
+#       pattern with itself
+#   section_conflicts (view)
+#       term, course_a, group_a, course_b, group_b, crn_a, crn_b: every pair
+#       of distinct overlapping sections
+#
+# Both catalogs keep the CRN in timings; databases built before that get the
+# same tables without the crn columns.
+#
+# On the UIC catalog that is ~9.3k sections in ~1.3k patterns and ~91k
+# pattern_conflicts rows, instead of ~4.4M section pair rows. Conflicts are
+# found with a sweep line per term over the patterns' meeting intervals,
+# sorted by start, with a heap of the meetings still in progress. Meetings
+# overlap like Planner.has_conflict decides it: s1 < e2 and s2 < e1, so
+# back-to-back meetings do not conflict.
+#
+# After an incremental update only the updated subjects' sections are
+# rewritten (their old rows go with the subject); patterns not seen before get
+# new ids and their conflicts are added. Patterns no section uses any more are
+# left in place until the next full build.
+#
+#   SELECT course_b, group_b FROM section_conflicts
+#   WHERE term = 'fall' AND course_a = 'CS___141' AND group_a = 0
+#
+#   SELECT crn_b FROM section_conflicts WHERE term = 'fall' AND crn_a = '34657'
+#
+# Built by every DuckDB builder (duckdb_layout.finish_catalog).
+
+
+def sweep_conflicts(intervals):
+    """Overlapping pairs among (start, end, key) intervals, as a set of (key_a, key_b) with key_a < key_b."""
+    pairs = set()
+    active = []  # heap of (end, key) for intervals that started and haven't ended
+    for start, end, key in sorted(intervals):
+        while active and active[0][0] <= start:
+            heapq.heappop(active)
+        for _, other in active:
+            if other != key:
+                pairs.add((min(key, other), max(key, other)))
+        heapq.heappush(active, (end, key))
+    return pairs
+
+
+def build_section_conflicts(con, subjects=None):
+    """(Re)create meeting_patterns, section_patterns, pattern_conflicts and the section_conflicts view.
+
+    With `subjects` (updated by an incremental load), only those subjects'
+    sections are rewritten; None rebuilds the tables. Returns {table: rows written}.
+    """
+    columns = {column for (column,) in con.execute(
+        "SELECT column_name FROM information_schema.columns WHERE table_name = 'timings'").fetchall()}
+    has_crn = "crn" in columns
+    crn = "crn, " if has_crn else ""
+    tables = {table for (table,) in con.execute("SELECT table_name FROM information_schema.tables").fetchall()}
+    full = subjects is None or not {"meeting_patterns", "section_patterns", "pattern_conflicts"} <= tables
+
+    if full:
+        con.execute("""
+        CREATE OR REPLACE TABLE meeting_patterns (
+          pattern_id INT,
+          term TEXT,
+          meetings INT[]
+        )""")
+        con.execute(f"""
+        CREATE OR REPLACE TABLE section_patterns (
+          subject TEXT,
+          term TEXT,
+          course_id TEXT,
+          group_idx INT,
+          {"crn TEXT," if has_crn else ""}
+          pattern_id INT
+        )""")
+        con.execute("""
+        CREATE OR REPLACE TABLE pattern_conflicts (
+          pattern_a INT,
+          pattern_b INT
+        )""")
+        known = {}
+    else:
+        con.execute("DELETE FROM section_patterns WHERE subject = ANY($1)", [sorted(subjects)])
+        known = {(term, tuple(meetings)): pattern_id for pattern_id, term, meetings in con.execute(
+            "SELECT pattern_id, term, meetings FROM meeting_patterns").fetchall()}
+
+    # Each section's meetings, in a canonical order
+    sections = defaultdict(list)
+    for subject, term, course_id, group_idx, *section_crn, start, end_time in con.execute(f"""
+        SELECT subject, term, course_id, group_idx, {crn}start, end_time FROM timings
+        WHERE start < end_time {"" if full else "AND subject = ANY($subjects)"}
+        ORDER BY subject, term, course_id, group_idx, start, end_time
+    """, {} if full else {"subjects": sorted(subjects)}).fetchall():
+        sections[(subject, term, course_id, group_idx, *section_crn)].append(start)
+        sections[(subject, term, course_id, group_idx, *section_crn)].append(end_time)
+
+    def pattern_of(section, meetings):
+        return section[1], tuple(meetings)
+
+    new_patterns = sorted({pattern_of(*item) for item in sections.items()} - known.keys())
+    next_id = max(known.values(), default=-1) + 1
+    patterns = dict(known)
+    for pattern_id, pattern in enumerate(new_patterns, start=next_id):
+        patterns[pattern] = pattern_id
+    new_ids = {patterns[pattern] for pattern in new_patterns}
+
+    # Sorted and indexed by duckdb_layout.optimize_layout
+    batch = ColumnBatch(con, tables={"meeting_patterns", "section_patterns", "pattern_conflicts"})
+    for pattern in new_patterns:
+        batch.add("meeting_patterns", patterns[pattern], pattern[0], list(pattern[1]))
+        batch.add("pattern_conflicts", patterns[pattern], patterns[pattern])
+    for section, meetings in sections.items():
+        batch.add("section_patterns", *section, patterns[pattern_of(section, meetings)])
+
+    if new_ids:
+        # Sweep each term with a new pattern over all its patterns, keeping pairs that involve a new one
+        intervals_by_term = defaultdict(list)
+        for (term, meetings), pattern_id in patterns.items():
+            intervals_by_term[term].extend((meetings[i], meetings[i + 1], pattern_id)
+                                           for i in range(0, len(meetings), 2))
+        for term in sorted({pattern[0] for pattern in new_patterns}):
+            for pattern_a, pattern_b in sweep_conflicts(intervals_by_term[term]):
+                if pattern_a in new_ids or pattern_b in new_ids:
+                    batch.add("pattern_conflicts", pattern_a, pattern_b)
+                    batch.add("pattern_conflicts", pattern_b, pattern_a)
+    inserted = batch.flush(con)
+
+    crn_columns = ", a.crn AS crn_a, b.crn AS crn_b" if has_crn else ""
+    con.execute(f"""
+    CREATE OR REPLACE VIEW section_conflicts AS
+    SELECT a.term, a.course_id AS course_a, a.group_idx AS group_a,
+           b.course_id AS course_b, b.group_idx AS group_b{crn_columns}
+    FROM section_patterns a
+    JOIN pattern_conflicts c ON c.pattern_a = a.pattern_id
+    JOIN section_patterns b ON b.pattern_id = c.pattern_b
+    WHERE a.course_id <> b.course_id OR a.group_idx <> b.group_idx
+    """)
+    return {table: inserted.get(table, 0) for table in ("meeting_patterns", "section_patterns", "pattern_conflicts")}
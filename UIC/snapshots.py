@@ -0,0 +1,81 @@
+import gzip
+import hashlib
+import json
+import os
+import threading
+
+# Content-addressed snapshot store of raw schedule pages.
+#
+# Layout:
+#   <root>/manifest.json                   subjects, terms and (subject, term-year) → page hash
+#   <root>/objects/<aa>/<sha256>.html.gz   gzip-compressed page bodies, stored once per content
+#
+# A snapshot lets scrape_subject_links.py re-run the whole parse/write
+# pipeline from disk with no network (--replay), and gives the parser
+# benchmarks a fixed input set.
+
+
+class SnapshotStore:
+    def __init__(self, root):
+        self.root = root
+        self.manifest_path = os.path.join(root, "manifest.json")
+        self._lock = threading.Lock()
+        self.manifest = {"subjects": [], "terms": [], "pages": {}}
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path) as f:
+                self.manifest = json.load(f)
+
+    def _object_path(self, digest):
+        return os.path.join(self.root, "objects", digest[:2], f"{digest}.html.gz")
+
+    def set_scope(self, subjects, terms):
+        """Record the subject list and (term, year) window the snapshot covers."""
+        with self._lock:
+            self.manifest["subjects"] = sorted(subjects)
+            self.manifest["terms"] = [[term, year] for term, year in terms]
+
+    def put(self, subject, term, year, html):
+        """Store one page (None = page missing) and return its content hash."""
+        digest = None
+        if html is not None:
+            body = html.encode("utf-8")
+            digest = hashlib.sha256(body).hexdigest()
+            path = self._object_path(digest)
+            if not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp_path = f"{path}.tmp.{threading.get_ident()}"
+                with gzip.open(tmp_path, "wb", compresslevel=9) as f:
+                    f.write(body)
+                os.replace(tmp_path, path)
+        with self._lock:
+            self.manifest["pages"].setdefault(subject, {})[f"{term}-{year}"] = digest
+        return digest
+
+    def get(self, subject, term, year):
+        """Return the stored HTML for (subject, term, year), or None."""
+        digest = self.manifest["pages"].get(subject, {}).get(f"{term}-{year}")
+        if digest is None:
+            return None
+        with gzip.open(self._object_path(digest), "rb") as f:
+            return f.read().decode("utf-8")
+
+    def subjects(self):
+        return list(self.manifest["subjects"]) or sorted(self.manifest["pages"])
+
+    def terms(self):
+        return [(term, int(year)) for term, year in self.manifest["terms"]]
+
+    def pages(self, subject):
+        """All stored pages of one subject as {"term-year": html or None}."""
+        return {
+            f"{term}-{year}": self.get(subject, term, year)
+            for term, year in self.terms()
+        }
+
+    def save(self):
+        os.makedirs(self.root, exist_ok=True)
+        with self._lock:
+            tmp_path = f"{self.manifest_path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(self.manifest, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.manifest_path)
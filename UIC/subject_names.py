@@ -0,0 +1,74 @@
+import json
+import os
+import re
+import threading
+
+from bs4 import BeautifulSoup
+
+# Human-readable subject names ("CS" → "computer science").
+#
+# scrape_subject_links.py reads the name off a schedule page it already
+# downloaded and stores it here; build_combined_json.py reads this cache and
+# only goes to the network for subjects that are missing.
+
+DEFAULT_NAME_CACHE_PATH = "UIC/data/subject_names.json"
+
+SUBJECT_HEADING = re.compile(r"(Fall|Spring)\s+\d{4}\s+([A-Za-z0-9&/\-.,\s]+)", re.IGNORECASE)
+
+
+def extract_subject_name(html: str) -> str | None:
+    """Subject name from a schedule page heading like "Fall 2025 Computer Science"."""
+    soup = BeautifulSoup(html, "html.parser")
+    # Gather all visible text chunks
+    texts = []
+    for el in soup.find_all(string=True):
+        txt = el.strip()
+        if txt and len(txt) < 120:  # ignore long paragraphs
+            texts.append(txt)
+
+    for txt in texts:
+        m = SUBJECT_HEADING.search(txt)
+        if m:
+            name = m.group(2).strip()
+            # Remove trailing stuff after "Location:" or "Phone:"
+            name = re.split(r"\bLocation\b|\bPhone\b|Last generated:", name, maxsplit=1)[0].strip(" -:.,")
+            if len(name) > 3 and name.lower() != "semester":
+                return name.lower()
+    return None
+
+
+class SubjectNameCache:
+    """Persistent subject code → lowercased name map (JSON file)."""
+
+    def __init__(self, path=DEFAULT_NAME_CACHE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self.names = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                self.names = json.load(f)
+
+    def get(self, subject):
+        with self._lock:
+            return self.names.get(subject)
+
+    def put(self, subject, name):
+        if not name:
+            return
+        with self._lock:
+            self.names[subject] = name.lower()
+
+    def missing(self, subjects):
+        with self._lock:
+            return [s for s in subjects if s not in self.names]
+
+    def save(self):
+        """Write the cache atomically (temp file + rename)."""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(self.names, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.path)
@@ -0,0 +1,109 @@
+import json
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+
+import requests
+
+import http_client
+
+# Term discovery and ingestion tracking for scrape_subject_links.py.
+#
+# Instead of a hardcoded start_year/end_year window, the scraper asks the
+# schedule site which terms exist, and remembers which terms were already
+# fully scraped. Old terms are frozen ("final") and served from the HTTP
+# cache; only new terms and the newest few (still changing) are requested.
+
+DEFAULT_TERM_STATE_PATH = "UIC/data/term_state.json"
+
+# The newest N published terms can still change (sections added, rooms moved)
+OPEN_TERMS = 2
+
+TERM_LINK = re.compile(r"\b(fall|spring)-(\d{4})\b", re.IGNORECASE)
+
+
+def term_sort_key(term_year):
+    """Chronological order: spring Y comes before fall Y."""
+    term, year = term_year
+    return (int(year), 0 if term == "spring" else 1)
+
+
+def discover_terms(base_url, since_year, until_year=None):
+    """Return the published (term, year) pairs from `since_year` on, oldest first.
+
+    Reads term links from the schedule root index; if that page lists none,
+    probes each candidate term's index page instead. Returns [] when the
+    site cannot be reached.
+    """
+    until_year = until_year or date.today().year + 1
+    found = set()
+    try:
+        response = http_client.get(f"{base_url}/index.html")
+        if response.status_code == 200:
+            for term, year in TERM_LINK.findall(response.text):
+                found.add((term.lower(), int(year)))
+    except requests.RequestException as e:
+        print(f"[WARN] Could not read schedule index: {e}")
+
+    if not found:
+        candidates = [
+            (term, year)
+            for year in range(since_year, until_year + 1)
+            for term in ("spring", "fall")
+        ]
+
+        def exists(term_year):
+            term, year = term_year
+            try:
+                return http_client.get(f"{base_url}/{term}-{year}/index.html").status_code == 200
+            except requests.RequestException:
+                return False
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            found = {ty for ty, ok in zip(candidates, pool.map(exists, candidates)) if ok}
+
+    return sorted((ty for ty in found if ty[1] >= since_year), key=term_sort_key)
+
+
+class TermState:
+    """Which terms have been ingested, and which of those are frozen."""
+
+    def __init__(self, path=DEFAULT_TERM_STATE_PATH):
+        self.path = path
+        self.terms = {}  # "fall-2024" → {"ingested": iso time, "final": bool}
+        if os.path.exists(path):
+            with open(path) as f:
+                self.terms = json.load(f)
+
+    def is_final(self, term, year):
+        return self.terms.get(f"{term}-{year}", {}).get("final", False)
+
+    def plan(self, terms, open_terms=OPEN_TERMS):
+        """Split `terms` (oldest first) into (frozen, to_fetch).
+
+        A term is frozen once it was ingested and is no longer among the
+        newest `open_terms`; everything else is (re)fetched.
+        """
+        newest = set(terms[-open_terms:]) if open_terms > 0 else set()
+        frozen = [ty for ty in terms if self.is_final(*ty) and ty not in newest]
+        to_fetch = [ty for ty in terms if ty not in frozen]
+        return frozen, to_fetch
+
+    def record_ingested(self, terms, open_terms=OPEN_TERMS):
+        """Mark a finished run's terms as ingested; freeze those outside the open window."""
+        now = datetime.now().isoformat(timespec="seconds")
+        newest = set(terms[-open_terms:]) if open_terms > 0 else set()
+        for term, year in terms:
+            entry = self.terms.setdefault(f"{term}-{year}", {})
+            entry["ingested"] = now
+            entry["final"] = (term, year) not in newest
+
+    def save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.terms, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,139 @@
+from collections import defaultdict
+
+# Loaders for the four per-subject TSV files written by the scrapers:
+#   mastercourselist_<S>.txt   code  credits
+#   prerequisites_<S>.txt      prereq  course  flag
+#   courseoffering_<S>.txt     code  fall(0/1)  spring(0/1)
+#   coursetiming_<S>.txt       code  [term]  num_crns  num_sessions  crn start end [crn start end]...
+#
+# Shared by UIC/build_combined_json.py and the UIS builders. Each file is read
+# with one bulk read, and results are plain dicts/lists already in the shape
+# combined.json uses (so they pickle cheaply across worker processes).
+#
+# Benchmark against the old per-script loaders with UIC/bench_loaders.py.
+
+TERMS = ("fall", "spring")
+
+
+def normalize_code(code: str) -> str:
+    return code.strip().ljust(8, '_')
+
+
+def _rows(path):
+    """Tab-split rows of a file; surrounding whitespace is stripped per line."""
+    with open(path) as f:
+        data = f.read()
+    return [line.strip().split('\t') for line in data.split('\n')]
+
+
+def master_course_list_from_rows(rows):
+    """{code: credit string}, e.g. {"CS___141": "3"} or {"MATH_180": "4,5"}."""
+    return {
+        normalize_code(parts[0]): parts[1]
+        for parts in rows
+        if len(parts) == 2
+    }
+
+
+def prerequisites_from_rows(rows):
+    """{course: [{"id": prereq, "type": flag}, ...]} in file order."""
+    prereqs = {}
+    for parts in rows:
+        if len(parts) == 3:
+            prereq, course, flag = parts
+            prereqs.setdefault(normalize_code(course), []).append({
+                "id": normalize_code(prereq),
+                "type": flag
+            })
+    return prereqs
+
+
+def course_offerings_from_rows(rows):
+    """{code: {"fall": bool, "spring": bool}}."""
+    return {
+        normalize_code(parts[0]): {"fall": parts[1] == "1", "spring": parts[2] == "1"}
+        for parts in rows
+        if len(parts) == 3
+    }
+
+
+def _group_by_crn(triplets):
+    """Slow path: [crn, start, end, ...] → one {"crn", "days", "time"} per CRN.
+
+    Incomplete or non-numeric triplets are skipped.
+    """
+    crn_sessions = defaultdict(list)
+    for i in range(0, len(triplets), 3):
+        try:
+            crn = triplets[i]
+            start = int(triplets[i + 1])
+            end = int(triplets[i + 2])
+        except (IndexError, ValueError):
+            continue
+        crn_sessions[crn].append((start, end))
+    return [
+        {"crn": crn, "days": len(sessions), "time": [t for pair in sessions for t in pair]}
+        for crn, sessions in crn_sessions.items()
+    ]
+
+
+def course_timings_from_rows(rows):
+    """{code: {"fall": [...], "spring": [...], "both": [...]}}.
+
+    Each list holds {"crn": str, "days": int, "time": [start, end, ...]}
+    entries. Reads both coursetiming formats:
+      A) code  term  num_crns  num_sessions  crn start end ...   (UIC, UIS)
+      B) code  num_crns  num_sessions  crn start end ...         (older UIS)
+    Format B rows go under "both"; the UIS builder fans them out to the
+    terms the course is offered in.
+    """
+    timings = {}
+    for parts in rows:
+        if len(parts) < 4:
+            continue
+
+        term = parts[1].strip().lower()
+        if term in TERMS:
+            triplets = parts[4:]
+        else:
+            term = "both"
+            triplets = parts[3:]
+
+        code = normalize_code(parts[0])
+        entry = timings.get(code)
+        if entry is None:
+            entry = timings[code] = {"fall": [], "spring": [], "both": []}
+
+        # Fast path: the scrapers write one CRN per row with whole triplets,
+        # so drop the CRN column and convert all start/end values at once
+        crns = triplets[0::3]
+        if len(triplets) % 3 == 0 and crns and crns.count(crns[0]) == len(crns):
+            times = triplets[:]
+            del times[::3]
+            try:
+                entry[term].append({"crn": crns[0], "days": len(crns), "time": list(map(int, times))})
+            except ValueError:
+                entry[term].extend(_group_by_crn(triplets))
+        else:
+            entry[term].extend(_group_by_crn(triplets))
+    return timings
+
+
+# Loaders for files on disk. The *_from_rows parsers above also take rows
+# straight from the scraper (scrape_subject_links.subject_rows), so the
+# in-process pipeline builds exactly what a TSV round-trip would.
+
+def load_master_course_list(path):
+    return master_course_list_from_rows(_rows(path))
+
+
+def load_prerequisites(path):
+    return prerequisites_from_rows(_rows(path))
+
+
+def load_course_offerings(path):
+    return course_offerings_from_rows(_rows(path))
+
+
+def load_course_timings(path):
+    return course_timings_from_rows(_rows(path))
@@ -1,81 +1,86 @@
+import gzip
 import json
-import duckdb
 import os
+import sys
+import argparse
+from time import perf_counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "UIC"))
+from duckdb_incremental import load_subjects
+from export_parquet import export_parquet
 
 def normalize_course_code(subject, course_number):
     """Pads subject and number to form an 8-character course code (e.g., CSC__225 or CS___141)."""
     return f"{subject}{'_' * (8 - len(subject) - len(course_number))}{course_number}"
 
 # Paths for UIS
-json_path = "uis/data/uis.json"
-db_path = "uis/data/uis.duckdb"
-
-with open(json_path) as f:
-    data = json.load(f)
-
-# Recreate DB
-if os.path.exists(db_path):
-    os.remove(db_path)
-con = duckdb.connect(db_path)
-
-# ---- Schemas ----
-con.execute("""
-CREATE TABLE subjects (
-  subject TEXT PRIMARY KEY,
-  subject_name TEXT
-)
-""")
-
-con.execute("""
-CREATE TABLE courses (
-  subject TEXT,
-  subject_name TEXT,
-  course_id TEXT,
-  credits FLOAT,
-  offered_fall BOOLEAN,
-  offered_spring BOOLEAN
-)
-""")
-
-con.execute("""
-CREATE TABLE timings (
-  subject TEXT,
-  course_id TEXT,
-  term TEXT,        -- 'fall' | 'spring'
-  group_idx INT,    -- index of the CRN-group within timing_(term)
-  crn TEXT,
-  start INT,
-  end_time INT
-)
-""")
-
-con.execute("""
-CREATE TABLE lecture_days (
-  subject TEXT,
-  course_id TEXT,
-  term TEXT,
-  group_idx INT,
-  crn TEXT,
-  days INT
-)
-""")
-
-con.execute("""
-CREATE TABLE prerequisites (
-  subject TEXT,
-  course_id TEXT,
-  prereq_id TEXT,
-  type INT
-)
-""")
-
-# ---- Load ----
-for subject, subject_data in data.items():
+DEFAULT_JSON_PATH = "UIS/data/uis.json"
+DEFAULT_DB_PATH = "UIS/data/uis.duckdb"
+DEFAULT_PARQUET_DIR = "UIS/data/parquet"
+
+
+# ---------- Schemas ----------
+def create_tables(con):
+    """Create the UIS catalog tables (timings and lecture_days keep the CRN)."""
+    con.execute("""
+    CREATE TABLE subjects (
+      subject TEXT PRIMARY KEY,
+      subject_name TEXT
+    )
+    """)
+
+    con.execute("""
+    CREATE TABLE courses (
+      subject TEXT,
+      subject_name TEXT,
+      course_id TEXT,
+      credits FLOAT,
+      offered_fall BOOLEAN,
+      offered_spring BOOLEAN
+    )
+    """)
+
+    con.execute("""
+    CREATE TABLE timings (
+      subject TEXT,
+      course_id TEXT,
+      term TEXT,        -- 'fall' | 'spring'
+      group_idx INT,    -- index of the CRN-group within timing_(term)
+      crn TEXT,
+      start INT,
+      end_time INT
+    )
+    """)
+
+    con.execute("""
+    CREATE TABLE lecture_days (
+      subject TEXT,
+      course_id TEXT,
+      term TEXT,
+      group_idx INT,
+      crn TEXT,
+      days INT
+    )
+    """)
+
+    con.execute("""
+    CREATE TABLE prerequisites (
+      subject TEXT,
+      course_id TEXT,
+      prereq_id TEXT,
+      type INT
+    )
+    """)
+
+
+# ---------- Load ----------
+def add_subject(batch, subject, subject_data):
+    """Queue one uis.json subject entry into `batch` (see UIC/duckdb_batch.py)."""
     # lowercase subject_name; fallback to code.lower()
-    subject_name = (subject_data.get("subject_name") or subject).lower()
+    subject_name = (subject_data.get("subject") or subject).lower()
 
     # subjects table
-    con.execute("INSERT INTO subjects VALUES (?, ?)", (subject, subject_name))
+    batch.add("subjects", subject, subject_name)
 
     courses = subject_data.get("courses", [])
     for course in courses:
@@ -96,10 +101,7 @@ for subject, subject_data in data.items():
         fall = offered.get("fall", True)
         spring = offered.get("spring", True)
 
-        con.execute(
-            "INSERT INTO courses VALUES (?, ?, ?, ?, ?, ?)",
-            (subject, subject_name, course_id, credits, fall, spring),
-        )
+        batch.add("courses", subject, subject_name, course_id, credits, fall, spring)
 
         # Prereqs
         for prereq in course.get("prerequisites", []):
@@ -113,10 +115,7 @@ for subject, subject_data in data.items():
                 ptype = int(prereq.get("type", -1))
             except Exception:
                 ptype = -1
-            con.execute(
-                "INSERT INTO prerequisites VALUES (?, ?, ?, ?)",
-                (subject, course_id, normalized_prereq, ptype),
-            )
+            batch.add("prerequisites", subject, course_id, normalized_prereq, ptype)
 
         # Timings (timing_fall / timing_spring), keep CRN + 0/0 placeholders
         for term in ("fall", "spring"):
@@ -143,10 +142,7 @@ for subject, subject_data in data.items():
                     days = blocks_len
 
                 # lecture_days (store even if 0/0 only)
-                con.execute(
-                    "INSERT INTO lecture_days VALUES (?, ?, ?, ?, ?, ?)",
-                    (subject, course_id, term, group_idx, crn, days),
-                )
+                batch.add("lecture_days", subject, course_id, term, group_idx, crn, days)
 
                 # timings rows (include 0/0 pairs)
                 for i in range(0, len(time_blocks), 2):
@@ -155,9 +151,36 @@ for subject, subject_data in data.items():
                         end = int(time_blocks[i + 1])
                     except Exception:
                         continue
-                    con.execute(
-                        "INSERT INTO timings VALUES (?, ?, ?, ?, ?, ?, ?)",
-                        (subject, course_id, term, group_idx, crn, start, end),
-                    )
-
-print("✅ UIS DuckDB fully built from uis/data/uis.json with lowercase subject_name stored in subjects & courses")
+                    batch.add("timings", subject, course_id, term, group_idx, crn, start, end)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build UIS/data/uis.duckdb from uis.json")
+    parser.add_argument("--json", default=DEFAULT_JSON_PATH,
+                        help="uis.json to load, optionally gzipped (.gz) (default: %(default)s)")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH,
+                        help="DuckDB file to (re)create (default: %(default)s)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="only delete and re-insert subjects whose entry changed since the last build")
+    parser.add_argument("--swap", action="store_true",
+                        help="build on a copy and rename it into place, so open readers are never interrupted")
+    parser.add_argument("--parquet", nargs="?", const=DEFAULT_PARQUET_DIR, metavar="DIR",
+                        help="also export the finished catalog to partitioned Parquet "
+                             "(see UIC/export_parquet.py; default dir: %(const)s)")
+    args = parser.parse_args()
+
+    started = perf_counter()
+    # uis.json, or uis.json.gz (--output ...gz)
+    with (gzip.open if args.json.endswith(".gz") else open)(args.json, "rt") as f:
+        data = json.load(f)
+
+    # Bulk insert, one statement per table, in one transaction
+    result = load_subjects(data.items(), args.db, create_tables, add_subject, args.incremental, args.swap)
+    if args.incremental:
+        print(f"✅ UIS DuckDB updated: {len(result['changed'])} changed, {len(result['removed'])} removed subjects")
+    else:
+        print(f"✅ UIS DuckDB fully built from {args.json} with lowercase subject_name stored in subjects & courses")
+    print(f"⏱️ {', '.join(f'{table} {rows}' for table, rows in result['inserted'].items()) or 'no'} rows "
+          f"in {perf_counter() - started:.2f}s")
+    if args.parquet:
+        export_parquet(args.db, args.parquet)
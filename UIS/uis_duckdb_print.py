@@ -1,7 +1,7 @@
 import os
 import duckdb
 
-db_path = "uis/data/uis.duckdb"  # <-- UIS path
+db_path = "UIS/data/uis.duckdb"  # <-- UIS path
 
 if not os.path.exists(db_path):
     raise FileNotFoundError("UIS DB not found. Run your UIS DuckDB builder script first to create it.")
@@ -1,116 +1,17 @@
 import os
 import re
+import sys
 import json
-import requests
+import argparse
 from bs4 import BeautifulSoup
-from collections import defaultdict
-
-# ---------- helpers ----------
-def normalize_code(code: str) -> str:
-    return code.strip().ljust(8, '_')
-
-def load_master_course_list(path):
-    credits = {}
-    with open(path) as f:
-        for line in f:
-            parts = line.strip().split('\t')
-            if len(parts) == 2:
-                code, credit = parts
-                credits[normalize_code(code)] = credit
-    return credits
-
-def load_prerequisites(path):
-    prereqs = defaultdict(list)
-    with open(path) as f:
-        for line in f:
-            parts = line.strip().split('\t')
-            if len(parts) == 3:
-                prereq, course, flag = parts
-                prereq = normalize_code(prereq)
-                course = normalize_code(course)
-                prereqs[course].append({"id": prereq, "type": flag})
-    return prereqs
-
-def load_course_offerings(path):
-    offerings = {}
-    with open(path) as f:
-        for line in f:
-            parts = line.strip().split('\t')
-            if len(parts) == 3:
-                code, fall, spring = parts
-                offerings[normalize_code(code)] = {
-                    "fall": fall == "1",
-                    "spring": spring == "1",
-                }
-    return offerings
-
-def load_course_timings(path):
-    """
-    Supports BOTH formats:
-
-    A) With term:
-       code  term  num_sections  num_sessions  crn  start  end  [crn start end]...
+from functools import partial
 
-    B) Without term:
-       code  num_sections  num_sessions  crn  start  end  [crn start end]...
-       -> stored as 'both' and later fanned out to offered terms.
-    """
-    timing_by_course = defaultdict(lambda: {"fall": [], "spring": [], "both": []})
-
-    with open(path) as f:
-        for line in f:
-            parts = line.strip().split('\t')
-            if len(parts) < 4:
-                continue
-
-            code = normalize_code(parts[0])
-
-            # Detect format
-            has_term = len(parts) > 1 and parts[1].lower() in {"fall", "spring"}
-            idx = 2 if has_term else 1  # index where num_sections should be
-
-            try:
-                # num_sections, num_sessions (not used directly, but parsed for offset)
-                _num_sections = int(parts[idx]); _num_sessions = int(parts[idx + 1])
-            except Exception:
-                # If counts malformed, still try to parse triplets
-                pass
-
-            # Triplets start after counts
-            triplet_start = idx + 2
-            crn_blocks = parts[triplet_start:]
-            times = []
-            for i in range(0, len(crn_blocks), 3):
-                try:
-                    crn = crn_blocks[i]
-                    start = int(crn_blocks[i + 1])
-                    end = int(crn_blocks[i + 2])
-                    times.append((crn, start, end))
-                except (IndexError, ValueError):
-                    continue
-
-            # Group sessions by CRN then flatten as required
-            crn_sessions = defaultdict(list)
-            for crn, start, end in times:
-                crn_sessions[crn].append((start, end))
-
-            payload = []
-            for crn, session_list in crn_sessions.items():
-                time_flat = [t for pair in session_list for t in pair]
-                payload.append({
-                    "crn": crn,
-                    "days": len(session_list),
-                    "time": time_flat,
-                })
-
-            if has_term:
-                term = parts[1].lower()
-                if term in ("fall", "spring"):
-                    timing_by_course[code][term].extend(payload)
-            else:
-                timing_by_course[code]["both"].extend(payload)
-
-    return timing_by_course
+# Shared helpers live next to the UIC scripts
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "UIC"))
+import http_client
+from incremental_json import build_combined, file_sha256
+from subject_names import SubjectNameCache
+from tsv_loader import load_master_course_list, load_prerequisites, load_course_offerings, load_course_timings
 
 # ---------- subject name scraper (UIS) ----------
 CATALOG_INDEX = "https://catalog.uis.edu/coursedescriptions/"
@@ -122,7 +23,7 @@ def get_uis_subject_name_map() -> dict:
     e.g., {"CSC": "computer science", "ACC": "accounting", ...}
     """
     try:
-        resp = requests.get(CATALOG_INDEX, timeout=30)
+        resp = http_client.get(CATALOG_INDEX, timeout=30)
         resp.raise_for_status()
     except Exception:
         return {}
@@ -149,13 +50,116 @@ def get_uis_subject_name_map() -> dict:
 
     return mapping
 
+
+DEFAULT_NAME_CACHE_PATH = "UIS/data/subject_names.json"
+
+def load_uis_subject_names(subjects, cache_path=DEFAULT_NAME_CACHE_PATH, refresh=False):
+    """Subject code → lowercase name for `subjects`, from the on-disk cache.
+
+    The catalog index is only fetched when `refresh` is set or a subject is
+    missing from the cache. Subjects the index doesn't list fall back to the
+    lowercased code (cached too, so warm runs stay offline); if the fetch
+    fails, nothing new is cached and cached names are kept.
+    """
+    cache = SubjectNameCache(cache_path)
+    missing = cache.missing(subjects)
+    if refresh or missing:
+        print(f"🔎 Fetching UIS subject names ({len(missing)} not in {cache_path})")
+        code_to_name = get_uis_subject_name_map()
+        if code_to_name:
+            for subject, name in code_to_name.items():
+                cache.put(subject, name)
+            for subject in cache.missing(subjects):
+                cache.put(subject, subject.lower())
+            cache.save()
+        else:
+            print(f"⚠️ Could not fetch {CATALOG_INDEX}; using cached names, codes for the rest")
+    # subject_name: from cache, else fallback to code lowercased
+    return {subject: cache.get(subject) or subject.lower() for subject in subjects}
+
+# ---------- per-subject assembly ----------
+def build_subject_courses(subject, subject_path, backfilled_courses):
+    """Build one subject's course_array from its four TSV files.
+
+    Returns None when a file is missing. Module-level so it can run in a
+    ProcessPoolExecutor worker.
+    """
+    files = {
+        "credits": os.path.join(subject_path, f"mastercourselist_{subject}.txt"),
+        "prereqs": os.path.join(subject_path, f"prerequisites_{subject}.txt"),
+        "offerings": os.path.join(subject_path, f"courseoffering_{subject}.txt"),
+        "timings": os.path.join(subject_path, f"coursetiming_{subject}.txt"),
+    }
+
+    if not all(os.path.exists(p) for p in files.values()):
+        return None
+
+    credits = load_master_course_list(files["credits"])
+    prereqs = load_prerequisites(files["prereqs"])
+    offerings = load_course_offerings(files["offerings"])
+    timings = load_course_timings(files["timings"])
+
+    course_array = []
+    for course_code in sorted(credits.keys()):
+        credit_str = credits[course_code]
+        # Parse credits to floats (skip non-numeric like "???")
+        credits_list = [
+            float(c.strip())
+            for c in credit_str.split(',')
+            if c.strip().replace('.', '', 1).isdigit()
+        ]
+        if not credits_list:
+            # skip courses with no valid credit parsed
+            continue
+
+        course_data = {
+            "id": course_code,
+            "credits": credits_list,
+            "prerequisites": prereqs.get(course_code, []),
+        }
+
+        # Offerings logic (same as your UIC builder)
+        if course_code in offerings:
+            course_data["offerings"] = offerings[course_code]
+        elif course_code in backfilled_courses:
+            course_data["offerings"] = {"fall": False, "spring": False}
+        else:
+            course_data["offerings"] = {"fall": True, "spring": True}
+
+        # Timing logic:
+        # - If file had explicit term timings, keep them.
+        # - If file had no term (stored under "both"), fan out to offered terms only.
+        tinfo = timings.get(course_code, {})
+        fall_times = list(tinfo.get("fall", []))
+        spring_times = list(tinfo.get("spring", []))
+        both_times = list(tinfo.get("both", []))
+
+        if both_times:
+            if course_data["offerings"]["fall"]:
+                fall_times = fall_times or both_times
+            if course_data["offerings"]["spring"]:
+                spring_times = spring_times or both_times
+
+        if course_data["offerings"]["fall"] and fall_times:
+            course_data["timing_fall"] = fall_times
+        if course_data["offerings"]["spring"] and spring_times:
+            course_data["timing_spring"] = spring_times
+
+        course_array.append(course_data)
+    return course_array
+
+
 # ---------- main builder ----------
-def build_combined_json_uis():
-    base_dir = "uis/data/subjects"  # <--- UIS outputs live here: uis/data/<SUBJECT_CODE>/
-    combined = {}
+DEFAULT_BUILD_MANIFEST_PATH = "UIS/data/uis_manifest.json"
+DEFAULT_OUTPUT_PATH = "UIS/data/uis.json"
+DEFAULT_SHARD_DIR = "UIS/data/shards"
+
 
-    # Fetch subject name map once
-    code_to_name = get_uis_subject_name_map()
+def build_combined_json_uis(workers=1, manifest_path=DEFAULT_BUILD_MANIFEST_PATH, full=False,
+                            output_path=DEFAULT_OUTPUT_PATH, compact=False, shard_dir=None,
+                            name_cache_path=DEFAULT_NAME_CACHE_PATH, refresh_names=False):
+    """Build UIS/data/uis.json, re-assembling only subjects whose TSVs or name changed."""
+    base_dir = "UIS/data/subjects"  # <--- UIS outputs live here: UIS/data/<SUBJECT_CODE>/
 
     # Optional: mark backfilled courses as having no offerings by default (if present)
     credit_cache_path = "UIC/data/data_archive/credit_cache.json"
@@ -175,90 +179,36 @@ def build_combined_json_uis():
     if not os.path.isdir(base_dir):
         raise FileNotFoundError(f"Base directory not found: {base_dir}")
 
-    for subject in sorted(os.listdir(base_dir)):
-        subject_path = os.path.join(base_dir, subject)
-        if not os.path.isdir(subject_path):
-            continue
-
-        files = {
-            "credits": os.path.join(subject_path, f"mastercourselist_{subject}.txt"),
-            "prereqs": os.path.join(subject_path, f"prerequisites_{subject}.txt"),
-            "offerings": os.path.join(subject_path, f"courseoffering_{subject}.txt"),
-            "timings": os.path.join(subject_path, f"coursetiming_{subject}.txt"),
-        }
-
-        if not all(os.path.exists(p) for p in files.values()):
-            print(f"⚠️ Skipping {subject}: missing one or more files")
-            continue
-
-        # subject_name: from map, else fallback to code lowercased
-        subject_name = code_to_name.get(subject, subject.lower())
-
-        credits = load_master_course_list(files["credits"])
-        prereqs = load_prerequisites(files["prereqs"])
-        offerings = load_course_offerings(files["offerings"])
-        timings = load_course_timings(files["timings"])
-
-        course_array = []
-        for course_code in sorted(credits.keys()):
-            credit_str = credits[course_code]
-            # Parse credits to floats (skip non-numeric like "???")
-            credits_list = [
-                float(c.strip())
-                for c in credit_str.split(',')
-                if c.strip().replace('.', '', 1).isdigit()
-            ]
-            if not credits_list:
-                # skip courses with no valid credit parsed
-                continue
-
-            course_data = {
-                "id": course_code,
-                "credits": credits_list,
-                "prerequisites": prereqs.get(course_code, []),
-            }
-
-            # Offerings logic (same as your UIC builder)
-            if course_code in offerings:
-                course_data["offerings"] = offerings[course_code]
-            elif course_code in backfilled_courses:
-                course_data["offerings"] = {"fall": False, "spring": False}
-            else:
-                course_data["offerings"] = {"fall": True, "spring": True}
-
-            # Timing logic:
-            # - If file had explicit term timings, keep them.
-            # - If file had no term (stored under "both"), fan out to offered terms only.
-            tinfo = timings.get(course_code, {})
-            fall_times = list(tinfo.get("fall", []))
-            spring_times = list(tinfo.get("spring", []))
-            both_times = list(tinfo.get("both", []))
-
-            if both_times:
-                if course_data["offerings"]["fall"]:
-                    fall_times = fall_times or both_times
-                if course_data["offerings"]["spring"]:
-                    spring_times = spring_times or both_times
-
-            if course_data["offerings"]["fall"] and fall_times:
-                course_data["timing_fall"] = fall_times
-            if course_data["offerings"]["spring"] and spring_times:
-                course_data["timing_spring"] = spring_times
-
-            course_array.append(course_data)
-
-        combined[subject] = {
-            "subject": subject_name,  # ⬅️ added (lowercase)
-            "courses": course_array
-        }
-        print(f"✅ Processed {subject} ({subject_name}) → {len(course_array)} courses")
-
-    os.makedirs("uis/data", exist_ok=True)
-    output_path = "uis/data/uis.json"
-    with open(output_path, "w") as f:
-        json.dump(combined, f, indent=2)
+    subjects = [s for s in sorted(os.listdir(base_dir)) if os.path.isdir(os.path.join(base_dir, s))]
+    # Cached; the catalog index is only fetched for new subjects or with refresh_names
+    subject_names = load_uis_subject_names(subjects, name_cache_path, refresh_names)
 
-    print(f"\n🎉 uis.json saved with {len(combined)} subjects at {output_path}")
+    build_combined(base_dir, subjects, partial(build_subject_courses, backfilled_courses=backfilled_courses),
+                   output_path, manifest_path, names=subject_names,
+                   context={"credit_cache": file_sha256(credit_cache_path)},
+                   full=full, compact=compact, shard_dir=shard_dir, workers=workers)
 
 if __name__ == "__main__":
-    build_combined_json_uis()
+    parser = argparse.ArgumentParser(description="Build UIS/data/uis.json from the per-subject files")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="build subjects in this many worker processes "
+                             "(0 = one per CPU core, default: %(default)s)")
+    parser.add_argument("--manifest", default=DEFAULT_BUILD_MANIFEST_PATH,
+                        help="per-subject input hashes from the last build (default: %(default)s)")
+    parser.add_argument("--full", action="store_true",
+                        help="rebuild every subject, ignoring the manifest")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT_PATH,
+                        help="where to write the JSON; a .gz suffix gzips it (default: %(default)s)")
+    parser.add_argument("--compact", action="store_true",
+                        help="write compact JSON (no indentation; uses orjson when installed)")
+    parser.add_argument("--shards", nargs="?", const=DEFAULT_SHARD_DIR, metavar="DIR",
+                        help="also write one JSON file per subject plus manifest.json "
+                             "(default dir: %(const)s)")
+    parser.add_argument("--name-cache", default=DEFAULT_NAME_CACHE_PATH,
+                        help="subject name cache (default: %(default)s)")
+    parser.add_argument("--refresh-names", action="store_true",
+                        help="re-fetch subject names from the UIS catalog index")
+    args = parser.parse_args()
+    build_combined_json_uis(args.workers, args.manifest, args.full,
+                            args.output, args.compact, args.shards,
+                            args.name_cache, args.refresh_names)